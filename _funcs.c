@@ -0,0 +1,688 @@
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <structmember.h>
+
+
+static double
+monotonic_seconds(void)
+{
+#if PY_VERSION_HEX >= 0x030D0000
+    PyTime_t t;
+    if (PyTime_Monotonic(&t) < 0) {
+        return -1.0;
+    }
+    return PyTime_AsSecondsDouble(t);
+#else
+    return _PyTime_AsSecondsDouble(_PyTime_GetMonotonicClock());
+#endif
+}
+
+
+/* interleave ------------------------------------------------------------ */
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *iterators;
+    PyObject *round;
+    Py_ssize_t index;
+    int exhausted;
+} InterleaveObject;
+
+static PyObject *
+interleave_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+    if (kwargs != NULL && PyDict_GET_SIZE(kwargs)) {
+        PyErr_SetString(PyExc_TypeError, "interleave() takes no keyword arguments");
+        return NULL;
+    }
+    Py_ssize_t size = PyTuple_GET_SIZE(args);
+    PyObject *iterators = PyTuple_New(size);
+    if (iterators == NULL) {
+        return NULL;
+    }
+    for (Py_ssize_t i = 0; i < size; i++) {
+        PyObject *it = PyObject_GetIter(PyTuple_GET_ITEM(args, i));
+        if (it == NULL) {
+            Py_DECREF(iterators);
+            return NULL;
+        }
+        PyTuple_SET_ITEM(iterators, i, it);
+    }
+    InterleaveObject *self = (InterleaveObject *)type->tp_alloc(type, 0);
+    if (self == NULL) {
+        Py_DECREF(iterators);
+        return NULL;
+    }
+    self->iterators = iterators;
+    self->round = NULL;
+    self->index = 0;
+    self->exhausted = size == 0;
+    return (PyObject *)self;
+}
+
+static PyObject *
+interleave_next(InterleaveObject *self)
+{
+    Py_ssize_t size = PyTuple_GET_SIZE(self->iterators);
+    if (self->exhausted) {
+        return NULL;
+    }
+    if (self->round == NULL || self->index == size) {
+        PyObject *round = PyTuple_New(size);
+        if (round == NULL) {
+            return NULL;
+        }
+        for (Py_ssize_t i = 0; i < size; i++) {
+            PyObject *item = PyIter_Next(PyTuple_GET_ITEM(self->iterators, i));
+            if (item == NULL) {
+                self->exhausted = 1;
+                Py_DECREF(round);
+                Py_CLEAR(self->round);
+                return NULL;
+            }
+            PyTuple_SET_ITEM(round, i, item);
+        }
+        Py_XSETREF(self->round, round);
+        self->index = 0;
+    }
+    PyObject *item = PyTuple_GET_ITEM(self->round, self->index++);
+    Py_INCREF(item);
+    return item;
+}
+
+static int
+interleave_traverse(InterleaveObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->iterators);
+    Py_VISIT(self->round);
+    return 0;
+}
+
+static int
+interleave_clear(InterleaveObject *self)
+{
+    Py_CLEAR(self->iterators);
+    Py_CLEAR(self->round);
+    return 0;
+}
+
+static void
+interleave_dealloc(InterleaveObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    interleave_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyTypeObject InterleaveType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "_funcs.interleave",
+    .tp_doc = PyDoc_STR("interleave(*iterables)\n--\n\n"),
+    .tp_basicsize = sizeof(InterleaveObject),
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_new = interleave_new,
+    .tp_dealloc = (destructor)interleave_dealloc,
+    .tp_traverse = (traverseproc)interleave_traverse,
+    .tp_clear = (inquiry)interleave_clear,
+    .tp_iter = PyObject_SelfIter,
+    .tp_iternext = (iternextfunc)interleave_next,
+};
+
+
+/* repeat_each ----------------------------------------------------------- */
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *it;
+    PyObject *item;
+    Py_ssize_t n;
+    Py_ssize_t remaining;
+} RepeatEachObject;
+
+static PyObject *
+repeat_each_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"iterable", "n", NULL};
+    PyObject *iterable;
+    PyObject *n_obj = NULL;
+    Py_ssize_t n = 2;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O:repeat_each", kwlist, &iterable, &n_obj)) {
+        return NULL;
+    }
+    if (n_obj != NULL) {
+        n = PyNumber_AsSsize_t(n_obj, PyExc_OverflowError);
+        if (n == -1 && PyErr_Occurred()) {
+            return NULL;
+        }
+    }
+    PyObject *it = PyObject_GetIter(iterable);
+    if (it == NULL) {
+        return NULL;
+    }
+    RepeatEachObject *self = (RepeatEachObject *)type->tp_alloc(type, 0);
+    if (self == NULL) {
+        Py_DECREF(it);
+        return NULL;
+    }
+    self->it = it;
+    self->item = NULL;
+    self->n = n;
+    self->remaining = 0;
+    return (PyObject *)self;
+}
+
+static PyObject *
+repeat_each_next(RepeatEachObject *self)
+{
+    while (self->remaining <= 0) {
+        PyObject *item = PyIter_Next(self->it);
+        if (item == NULL) {
+            return NULL;
+        }
+        if (self->n <= 0) {
+            Py_DECREF(item);
+            continue;
+        }
+        Py_XSETREF(self->item, item);
+        self->remaining = self->n;
+    }
+    if (--self->remaining == 0) {
+        PyObject *item = self->item;
+        self->item = NULL;
+        return item;
+    }
+    Py_INCREF(self->item);
+    return self->item;
+}
+
+static int
+repeat_each_traverse(RepeatEachObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->it);
+    Py_VISIT(self->item);
+    return 0;
+}
+
+static int
+repeat_each_clear(RepeatEachObject *self)
+{
+    Py_CLEAR(self->it);
+    Py_CLEAR(self->item);
+    return 0;
+}
+
+static void
+repeat_each_dealloc(RepeatEachObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    repeat_each_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyTypeObject RepeatEachType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "_funcs.repeat_each",
+    .tp_doc = PyDoc_STR("repeat_each(iterable, n=2)\n--\n\n"),
+    .tp_basicsize = sizeof(RepeatEachObject),
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_new = repeat_each_new,
+    .tp_dealloc = (destructor)repeat_each_dealloc,
+    .tp_traverse = (traverseproc)repeat_each_traverse,
+    .tp_clear = (inquiry)repeat_each_clear,
+    .tp_iter = PyObject_SelfIter,
+    .tp_iternext = (iternextfunc)repeat_each_next,
+};
+
+
+/* split_after ----------------------------------------------------------- */
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *it;
+    PyObject *pred;
+    Py_ssize_t max_split;
+    int done;
+} SplitAfterObject;
+
+static PyObject *
+split_after_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"iterable", "pred", "max_split", NULL};
+    PyObject *iterable, *pred;
+    Py_ssize_t max_split = -1;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO|n:split_after", kwlist, &iterable, &pred, &max_split)) {
+        return NULL;
+    }
+    PyObject *it = PyObject_GetIter(iterable);
+    if (it == NULL) {
+        return NULL;
+    }
+    SplitAfterObject *self = (SplitAfterObject *)type->tp_alloc(type, 0);
+    if (self == NULL) {
+        Py_DECREF(it);
+        return NULL;
+    }
+    self->it = it;
+    Py_INCREF(pred);
+    self->pred = pred;
+    self->max_split = max_split;
+    self->done = 0;
+    return (PyObject *)self;
+}
+
+static PyObject *
+split_after_next(SplitAfterObject *self)
+{
+    if (self->done) {
+        return NULL;
+    }
+    if (self->max_split == 0) {
+        self->done = 1;
+        return PySequence_List(self->it);
+    }
+    PyObject *buf = PyList_New(0);
+    if (buf == NULL) {
+        self->done = 1;
+        return NULL;
+    }
+    PyObject *item;
+    while ((item = PyIter_Next(self->it)) != NULL) {
+        if (PyList_Append(buf, item) < 0) {
+            Py_DECREF(item);
+            Py_DECREF(buf);
+            self->done = 1;
+            return NULL;
+        }
+        PyObject *result = PyObject_CallOneArg(self->pred, item);
+        Py_DECREF(item);
+        if (result == NULL) {
+            Py_DECREF(buf);
+            self->done = 1;
+            return NULL;
+        }
+        int truth = PyObject_IsTrue(result);
+        Py_DECREF(result);
+        if (truth < 0) {
+            Py_DECREF(buf);
+            self->done = 1;
+            return NULL;
+        }
+        if (truth) {
+            if (self->max_split > 0) {
+                self->max_split--;
+            }
+            return buf;
+        }
+    }
+    if (PyErr_Occurred()) {
+        Py_DECREF(buf);
+        self->done = 1;
+        return NULL;
+    }
+    self->done = 1;
+    if (PyList_GET_SIZE(buf)) {
+        return buf;
+    }
+    Py_DECREF(buf);
+    return NULL;
+}
+
+static int
+split_after_traverse(SplitAfterObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->it);
+    Py_VISIT(self->pred);
+    return 0;
+}
+
+static int
+split_after_clear(SplitAfterObject *self)
+{
+    Py_CLEAR(self->it);
+    Py_CLEAR(self->pred);
+    return 0;
+}
+
+static void
+split_after_dealloc(SplitAfterObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    split_after_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyTypeObject SplitAfterType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "_funcs.split_after",
+    .tp_doc = PyDoc_STR("split_after(iterable, pred, max_split=-1)\n--\n\n"),
+    .tp_basicsize = sizeof(SplitAfterObject),
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_new = split_after_new,
+    .tp_dealloc = (destructor)split_after_dealloc,
+    .tp_traverse = (traverseproc)split_after_traverse,
+    .tp_clear = (inquiry)split_after_clear,
+    .tp_iter = PyObject_SelfIter,
+    .tp_iternext = (iternextfunc)split_after_next,
+};
+
+
+/* map_if ---------------------------------------------------------------- */
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *it;
+    PyObject *pred;
+    PyObject *func;
+    PyObject *func_else;
+} MapIfObject;
+
+static PyObject *
+map_if_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"iterable", "pred", "func", "func_else", NULL};
+    PyObject *iterable, *pred, *func, *func_else;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOOO:map_if", kwlist, &iterable, &pred, &func, &func_else)) {
+        return NULL;
+    }
+    PyObject *it = PyObject_GetIter(iterable);
+    if (it == NULL) {
+        return NULL;
+    }
+    MapIfObject *self = (MapIfObject *)type->tp_alloc(type, 0);
+    if (self == NULL) {
+        Py_DECREF(it);
+        return NULL;
+    }
+    self->it = it;
+    Py_INCREF(pred);
+    self->pred = pred;
+    Py_INCREF(func);
+    self->func = func;
+    Py_INCREF(func_else);
+    self->func_else = func_else;
+    return (PyObject *)self;
+}
+
+static PyObject *
+map_if_next(MapIfObject *self)
+{
+    if (self->it == NULL) {
+        return NULL;
+    }
+    PyObject *item = PyIter_Next(self->it);
+    if (item == NULL) {
+        Py_CLEAR(self->it);
+        return NULL;
+    }
+    PyObject *result = PyObject_CallOneArg(self->pred, item);
+    if (result == NULL) {
+        Py_DECREF(item);
+        Py_CLEAR(self->it);
+        return NULL;
+    }
+    int truth = PyObject_IsTrue(result);
+    Py_DECREF(result);
+    if (truth < 0) {
+        Py_DECREF(item);
+        Py_CLEAR(self->it);
+        return NULL;
+    }
+    result = PyObject_CallOneArg(truth ? self->func : self->func_else, item);
+    Py_DECREF(item);
+    if (result == NULL) {
+        Py_CLEAR(self->it);
+    }
+    return result;
+}
+
+static int
+map_if_traverse(MapIfObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->it);
+    Py_VISIT(self->pred);
+    Py_VISIT(self->func);
+    Py_VISIT(self->func_else);
+    return 0;
+}
+
+static int
+map_if_clear(MapIfObject *self)
+{
+    Py_CLEAR(self->it);
+    Py_CLEAR(self->pred);
+    Py_CLEAR(self->func);
+    Py_CLEAR(self->func_else);
+    return 0;
+}
+
+static void
+map_if_dealloc(MapIfObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    map_if_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyTypeObject MapIfType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "_funcs.map_if",
+    .tp_doc = PyDoc_STR("map_if(iterable, pred, func, func_else)\n--\n\n"),
+    .tp_basicsize = sizeof(MapIfObject),
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_new = map_if_new,
+    .tp_dealloc = (destructor)map_if_dealloc,
+    .tp_traverse = (traverseproc)map_if_traverse,
+    .tp_clear = (inquiry)map_if_clear,
+    .tp_iter = PyObject_SelfIter,
+    .tp_iternext = (iternextfunc)map_if_next,
+};
+
+
+/* time_limited ---------------------------------------------------------- */
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *limit_seconds;
+    PyObject *it;
+    double limit;
+    double start_time;
+    char timed_out;
+} TimeLimitedObject;
+
+static PyObject *
+time_limited_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"limit_seconds", "iterable", NULL};
+    PyObject *limit_seconds, *iterable;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO:time_limited", kwlist, &limit_seconds, &iterable)) {
+        return NULL;
+    }
+    double limit = PyFloat_AsDouble(limit_seconds);
+    if (limit == -1.0 && PyErr_Occurred()) {
+        return NULL;
+    }
+    if (limit < 0) {
+        PyErr_SetString(PyExc_ValueError, "limit_seconds must be positive");
+        return NULL;
+    }
+    PyObject *it = PyObject_GetIter(iterable);
+    if (it == NULL) {
+        return NULL;
+    }
+    double start_time = monotonic_seconds();
+    if (start_time < 0 && PyErr_Occurred()) {
+        Py_DECREF(it);
+        return NULL;
+    }
+    TimeLimitedObject *self = (TimeLimitedObject *)type->tp_alloc(type, 0);
+    if (self == NULL) {
+        Py_DECREF(it);
+        return NULL;
+    }
+    Py_INCREF(limit_seconds);
+    self->limit_seconds = limit_seconds;
+    self->it = it;
+    self->limit = limit;
+    self->start_time = start_time;
+    self->timed_out = 0;
+    return (PyObject *)self;
+}
+
+static PyObject *
+time_limited_next(TimeLimitedObject *self)
+{
+    if (self->limit == 0) {
+        self->timed_out = 1;
+        return NULL;
+    }
+    PyObject *item = PyIter_Next(self->it);
+    if (item == NULL) {
+        return NULL;
+    }
+    double now = monotonic_seconds();
+    if (now < 0 && PyErr_Occurred()) {
+        Py_DECREF(item);
+        return NULL;
+    }
+    if (now - self->start_time > self->limit) {
+        self->timed_out = 1;
+        Py_DECREF(item);
+        return NULL;
+    }
+    return item;
+}
+
+static PyObject *
+time_limited_remaining(TimeLimitedObject *self, void *closure)
+{
+    double now = monotonic_seconds();
+    if (now < 0 && PyErr_Occurred()) {
+        return NULL;
+    }
+    double remaining = self->limit - (now - self->start_time);
+    return PyFloat_FromDouble(remaining > 0 ? remaining : 0.0);
+}
+
+static int
+time_limited_traverse(TimeLimitedObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->limit_seconds);
+    Py_VISIT(self->it);
+    return 0;
+}
+
+static int
+time_limited_clear(TimeLimitedObject *self)
+{
+    Py_CLEAR(self->limit_seconds);
+    Py_CLEAR(self->it);
+    return 0;
+}
+
+static void
+time_limited_dealloc(TimeLimitedObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    time_limited_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyObject *
+time_limited_get_limit_seconds(TimeLimitedObject *self, void *closure)
+{
+    Py_INCREF(self->limit_seconds);
+    return self->limit_seconds;
+}
+
+static int
+time_limited_set_limit_seconds(TimeLimitedObject *self, PyObject *value, void *closure)
+{
+    if (value == NULL) {
+        PyErr_SetString(PyExc_AttributeError, "cannot delete limit_seconds");
+        return -1;
+    }
+    double limit = PyFloat_AsDouble(value);
+    if (limit == -1.0 && PyErr_Occurred()) {
+        return -1;
+    }
+    Py_INCREF(value);
+    Py_SETREF(self->limit_seconds, value);
+    self->limit = limit;
+    return 0;
+}
+
+static PyObject *
+time_limited_close(TimeLimitedObject *self, PyObject *Py_UNUSED(ignored))
+{
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef time_limited_methods[] = {
+    {"close", (PyCFunction)time_limited_close, METH_NOARGS, NULL},
+    {NULL}
+};
+
+static PyMemberDef time_limited_members[] = {
+    {"timed_out", T_BOOL, offsetof(TimeLimitedObject, timed_out), 0, NULL},
+    {"_start_time", T_DOUBLE, offsetof(TimeLimitedObject, start_time), READONLY, NULL},
+    {NULL}
+};
+
+static PyGetSetDef time_limited_getset[] = {
+    {"limit_seconds", (getter)time_limited_get_limit_seconds, (setter)time_limited_set_limit_seconds, NULL, NULL},
+    {"remaining", (getter)time_limited_remaining, NULL, NULL, NULL},
+    {NULL}
+};
+
+static PyTypeObject TimeLimitedType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "_funcs.time_limited",
+    .tp_doc = PyDoc_STR("time_limited(limit_seconds, iterable)\n--\n\n"),
+    .tp_basicsize = sizeof(TimeLimitedObject),
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GC,
+    .tp_new = time_limited_new,
+    .tp_dealloc = (destructor)time_limited_dealloc,
+    .tp_traverse = (traverseproc)time_limited_traverse,
+    .tp_clear = (inquiry)time_limited_clear,
+    .tp_iter = PyObject_SelfIter,
+    .tp_iternext = (iternextfunc)time_limited_next,
+    .tp_methods = time_limited_methods,
+    .tp_members = time_limited_members,
+    .tp_getset = time_limited_getset,
+};
+
+
+/* module ---------------------------------------------------------------- */
+
+static struct PyModuleDef funcs_module = {
+    PyModuleDef_HEAD_INIT,
+    .m_name = "_funcs",
+    .m_doc = "C accelerators for the funcs module.",
+    .m_size = -1,
+};
+
+PyMODINIT_FUNC
+PyInit__funcs(void)
+{
+    PyTypeObject *types[] = {
+        &InterleaveType, &RepeatEachType, &SplitAfterType, &MapIfType, &TimeLimitedType,
+    };
+    PyObject *module = PyModule_Create(&funcs_module);
+    if (module == NULL) {
+        return NULL;
+    }
+    for (size_t i = 0; i < sizeof(types) / sizeof(types[0]); i++) {
+        if (PyType_Ready(types[i]) < 0) {
+            Py_DECREF(module);
+            return NULL;
+        }
+        const char *name = strrchr(types[i]->tp_name, '.') + 1;
+        Py_INCREF(types[i]);
+        if (PyModule_AddObject(module, name, (PyObject *)types[i]) < 0) {
+            Py_DECREF(types[i]);
+            Py_DECREF(module);
+            return NULL;
+        }
+    }
+    return module;
+}
@@ -1,36 +1,102 @@
-from itertools import islice, chain, repeat, tee, chain, starmap
-from functools import partial
-from collections.abc import Sequence
+from itertools import islice, chain, repeat, tee, chain, starmap, compress, count, cycle, groupby, accumulate
+from functools import partial, singledispatch, wraps, lru_cache
+from bisect import bisect_left, bisect_right
+import inspect
+from collections.abc import Sequence, Mapping
 from collections import deque
-from time import monotonic
-from operator import sub
+from time import monotonic, perf_counter
+from threading import Thread, Event
+from queue import Queue, Empty, Full
+from operator import sub, add, mul, eq, ne, le, ge, index, countOf, indexOf, itemgetter, methodcaller
+from re import escape, finditer
+from array import array
+from mmap import mmap, ACCESS_READ, PAGESIZE
+import mmap as _mmap
+from concurrent.futures import wait, FIRST_COMPLETED, ProcessPoolExecutor
+from os import cpu_count, fstat
+from sys import getsizeof, version_info
+from struct import calcsize
+from math import sqrt
+from random import Random
+from multiprocessing.shared_memory import SharedMemory
+from tempfile import TemporaryFile
+from traceback import clear_frames
+from weakref import WeakSet, finalize, ref
+import pickle
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import _funcs
+except ImportError:
+    _funcs = None
 
 l = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
 s = ['a', 'b', 'c', 'd']
 _marker = object()
+_buffer_types = (bytes, bytearray, memoryview, array, mmap)
 
 
 def take(iterable, n):
     return list(islice(iterable, n))
 
 
+def take_into(iterable, n, out):
+    if n > len(out):
+        raise ValueError('out is too small to hold n items')
+    filled = 0
+    for filled, item in enumerate(islice(iterable, n), 1):
+        out[filled - 1] = item
+    return filled
+
+
+def take_array(iterable, n, typecode):
+    return array(typecode, islice(iterable, n))
+
+
 def raise_(exception, *args):
     raise exception(*args)
 
 
+def _chunked_slices(seq, n):
+    size = len(seq)
+    if n is None:
+        n = size
+    elif n < 0:
+        raise ValueError('n must be a non-negative integer or None')
+    if n:
+        for start in range(0, size, n):
+            yield seq[start:start + n]
+
+
+def _sliceable(iterable):
+    if isinstance(iterable, _buffer_types):
+        return memoryview(iterable)
+    if isinstance(iterable, list) or (np is not None and isinstance(iterable, np.ndarray)):
+        return iterable
+    return None
+
+
+def _strict_chunks(iterator, n):
+    for chunk in iterator:
+        if len(chunk) != n:
+            raise ValueError('iterator is not divisible by n')
+        yield chunk
+
+
 def chunked(iterable, n, strict=False):
-    iterator = iter(partial(take, iter(iterable), n), [])
+    seq = _sliceable(iterable)
+    if seq is not None:
+        iterator = _chunked_slices(seq, n)
+    else:
+        iterator = iter(partial(take, iter(iterable), n), [])
     if strict:
         if n is None:
             raise ValueError('n cant be None when strict is True')
-
-        def ret():
-            for chunk in iterator:
-                if len(chunk) != n:
-                    raise ValueError('iterator is not divisible by n')
-                yield chunk
-
-        return iter(ret())
+        return _strict_chunks(iterator, n)
     return iterator
 
 
@@ -46,21 +112,58 @@ def first(iterable, default=_marker):
 def last(iterable, default=_marker):
     try:
         if isinstance(iterable, Sequence):
-            return iterable[-1]
+            value = iterable[-1] if len(iterable) else _marker
         elif hasattr(iterable, '__reversed__'):
-            return next(reversed(iterable))
+            value = next(reversed(iterable), _marker)
         else:
-            return deque(iterable, maxlen=1)[-1]
+            value = next(iter(deque(iterable, maxlen=1)), _marker)
     except(IndexError, TypeError, StopIteration):
+        value = _marker
+    if value is _marker:
         if default is _marker:
             raise ValueError(
                 'last() was called on an empty iterable and no default was provided.'
             )
         return default
+    return value
+
+
+@singledispatch
+def nth_lookup(iterable, n):
+    tail = deque(islice(iterable, n + 1), maxlen=1)
+    if not tail:
+        raise IndexError('nth_lookup() was called on an empty iterable')
+    return tail[0]
+
+
+@nth_lookup.register(Sequence)
+def _nth_sequence(iterable, n):
+    return iterable[n] if n < len(iterable) else iterable[-1]
+
+
+@nth_lookup.register(Mapping)
+@nth_lookup.register(type({}.keys()))
+@nth_lookup.register(type({}.values()))
+@nth_lookup.register(type({}.items()))
+def _nth_mapping(iterable, n):
+    if n < len(iterable) - 1 or not hasattr(iterable, '__reversed__'):
+        return nth_lookup.dispatch(object)(iterable, n)
+    for value in reversed(iterable):
+        return value
+    raise IndexError('nth_lookup() was called on an empty iterable')
+
+
+if np is not None:
+    nth_lookup.register(np.ndarray, _nth_sequence)
 
 
 def nth_or_last(iterable, n, default=_marker):
-    return last(islice(iterable, n + 1), default=default)
+    if n < 0:
+        return last(islice(iterable, n + 1), default=default)
+    try:
+        return nth_lookup(iterable, n)
+    except IndexError:
+        return last((), default=default)
 
 
 def one(iterable, too_short=None, too_long=None):
@@ -89,36 +192,169 @@ def interleave(*iterables):
     return chain.from_iterable(zip(*iterables))
 
 
-def repeat_each(iterable, n=2):
+def _repeat_each(iterable, n):
     return chain.from_iterable(map(repeat, iterable, repeat(n)))
 
 
-def strictly_n(iterable, n, too_short=None, too_long=None):
-    if too_short is None:
-        too_short = lambda item_count: raise_(
-            ValueError,
-            f'Too few items in iterable (got {item_count})'
-        )
-    if too_long is None:
-        too_long = lambda item_count: raise_(
-            ValueError,
-            f'Too few items in iterable (got at least {item_count}'
+def _roundrobin(live):
+    while live:
+        pulled = count(1)
+        yield from map(next, compress(cycle(live), pulled))
+        live.rotate(2 - next(pulled))
+        exhausted = live.popleft()
+        while live and live[0] is exhausted:
+            live.popleft()
+        while live and live[-1] is exhausted:
+            live.pop()
+
+
+def interleave_longest(*iterables):
+    return _roundrobin(deque(map(iter, iterables)))
+
+
+def roundrobin(*iterables, weights=None):
+    if weights is None:
+        return interleave_longest(*iterables)
+    weights = list(map(index, weights))
+    if len(weights) != len(iterables):
+        raise ValueError('weights must have one entry per iterable')
+    if any(weight < 0 for weight in weights):
+        raise ValueError('weights must be non-negative')
+    live = deque()
+    for iterable, weight in zip(iterables, weights):
+        live.extend(repeat(iter(iterable), weight))
+    return _roundrobin(live)
+
+
+def _merge_batches(iterators, key, buffer_size):
+    last_key = _identity if key is None else key
+    buffers = [[] for _ in iterators]
+    live = list(range(len(iterators)))
+    open_inputs = set(live)
+    while live:
+        for i in live:
+            buf = buffers[i]
+            if i in open_inputs and len(buf) < buffer_size:
+                buf += islice(iterators[i], buffer_size - len(buf))
+                if len(buf) < buffer_size:
+                    open_inputs.discard(i)
+        live = [i for i in live if buffers[i]]
+        if not live:
+            return
+        frontier = min(
+            (i for i in live if i in open_inputs), key=lambda i: last_key(buffers[i][-1]), default=None
         )
+        if frontier is not None:
+            bound = last_key(buffers[frontier][-1])
+        batch = []
+        for i in live:
+            buf = buffers[i]
+            if frontier is None:
+                cut = len(buf)
+            else:
+                keys = buf if key is None else list(map(key, buf))
+                cut = (bisect_right if i <= frontier else bisect_left)(keys, bound)
+            batch += buf[:cut]
+            del buf[:cut]
+        batch.sort(key=key)
+        yield batch
+
+
+def _unique_batches(batches, key):
+    last_key = _identity if key is None else key
+    last = _marker
+    for batch in batches:
+        batch = list(map(next, map(itemgetter(1), groupby(batch, key))))
+        if batch and last is not _marker and last_key(batch[0]) == last:
+            del batch[0]
+        if batch:
+            last = last_key(batch[-1])
+            yield batch
+
+
+def merge_sorted(*iterables, key=None, unique=False, buffer_size=1024, runs=False):
+    if buffer_size < 1:
+        raise ValueError('buffer_size must be at least 1')
+    batches = _merge_batches(list(map(iter, iterables)), key, buffer_size)
+    if unique:
+        batches = _unique_batches(batches, key)
+    if runs:
+        return batches
+    return chain.from_iterable(batches)
+
+
+if _funcs is not None:
+    interleave = _funcs.interleave
+    _repeat_each = _funcs.repeat_each
+
+
+def _repeat_array(values, n, counts):
+    if isinstance(values, array):
+        if np is None or values.typecode == 'u':
+            counts = repeat(n) if counts is None else counts
+            return array(values.typecode, chain.from_iterable(map(repeat, values, counts)))
+        return array(values.typecode, _repeat_array(np.asarray(memoryview(values)), n, counts).tobytes())
+    if counts is None:
+        return np.repeat(values, max(n, 0))
+    if isinstance(counts, (np.ndarray, array, list, tuple, range)):
+        counts = np.asarray(counts[:len(values)])
+    else:
+        counts = np.fromiter(islice(counts, len(values)), np.intp)
+    return np.repeat(values[:len(counts)], np.maximum(counts, 0))
+
+
+def repeat_each(iterable, n=2):
+    try:
+        n = index(n)
+    except TypeError:
+        counts = n
+    else:
+        counts = None
+    if isinstance(iterable, array) or (np is not None and isinstance(iterable, np.ndarray) and iterable.ndim == 1):
+        return _repeat_array(iterable, n, counts)
+    if counts is None:
+        return _repeat_each(iterable, n)
+    return chain.from_iterable(map(repeat, iterable, counts))
+
+
+def run_length_encode(iterable):
+    if isinstance(iterable, array):
+        if np is None or iterable.typecode == 'u':
+            values, counts = run_length_encode(iterable.tolist())
+            return array(iterable.typecode, values), array('q', counts)
+        values, counts = run_length_encode(np.asarray(memoryview(iterable)))
+        return array(iterable.typecode, values.tobytes()), array('q', counts.astype(np.int64).tobytes())
+    if np is not None and isinstance(iterable, np.ndarray) and iterable.ndim == 1:
+        starts = np.flatnonzero(iterable[1:] != iterable[:-1]) + 1
+        if len(iterable):
+            starts = np.concatenate(([0], starts))
+        return iterable[starts], np.diff(np.append(starts, len(iterable)))
+    seq = iterable if isinstance(iterable, list) else list(iterable)
+    if not seq:
+        return [], []
+    starts = [0]
+    starts += compress(count(1), map(ne, islice(seq, 1, None), seq))
+    values = list(map(seq.__getitem__, starts))
+    counts = list(map(sub, chain(islice(starts, 1, None), (len(seq),)), starts))
+    return values, counts
+
+
+def strictly_n(iterable, n, too_short=None, too_long=None):
     it = iter(iterable)
     for i in range(n):
         try:
             item = next(it)
         except StopIteration:
+            if too_short is None:
+                raise ValueError(f'Too few items in iterable (got {i})')
             too_short(i)
             return
 
         else:
             yield item
-    try:
-        next(it)
-    except StopIteration:
-        pass
-    else:
+    if next(it, _marker) is not _marker:
+        if too_long is None:
+            raise ValueError(f'Too few items in iterable (got at least {n + 1}')
         too_long(n + 1)
 
 
@@ -157,7 +393,59 @@ def always_iterable(obj, base_type=(str, bytes)):
         return iter((obj,))
 
 
-def split_after(iterable, pred, max_split=-1):
+def _find_all(data, sep):
+    step = len(sep)
+    pos = data.find(sep)
+    while pos != -1:
+        pos += step
+        yield pos
+        pos = data.find(sep, pos)
+
+
+def _index_all(seq, value):
+    pos = 0
+    try:
+        while True:
+            pos = seq.index(value, pos) + 1
+            yield pos
+    except ValueError:
+        return
+
+
+def _split_points(data, seq, pred):
+    if callable(pred):
+        return compress(count(1), map(pred, seq))
+    if isinstance(data, (bytes, bytearray, mmap)):
+        return _find_all(data, bytes([pred]) if isinstance(pred, int) else pred)
+    if isinstance(data, (memoryview, array)) and seq.ndim == 1 and seq.format in ('b', 'B', 'c') \
+            and isinstance(pred, (bytes, bytearray)):
+        if not seq.c_contiguous:
+            return _find_all(seq.tobytes(), pred)
+        return map(methodcaller('end'), finditer(escape(pred), seq.cast('B')))
+    if isinstance(data, list):
+        return _index_all(data, pred)
+    if np is not None and isinstance(data, np.ndarray) and data.ndim == 1:
+        return iter((np.flatnonzero(data == pred) + 1).tolist())
+    return compress(count(1), map(eq, seq, repeat(pred)))
+
+
+def _split_slices_after(seq, points, max_split):
+    if max_split == 0:
+        yield seq[:]
+        return
+    start = 0
+    for end in points:
+        yield seq[start:end]
+        start = end
+        if max_split == 1:
+            yield seq[start:]
+            return
+        max_split -= 1
+    if start < len(seq):
+        yield seq[start:]
+
+
+def _split_after(iterable, pred, max_split):
     if max_split == 0:
         yield list(iterable)
         return
@@ -176,7 +464,36 @@ def split_after(iterable, pred, max_split=-1):
         yield buf
 
 
-def split_into(iterable, sizes):
+if _funcs is not None:
+    _split_after = _funcs.split_after
+
+
+def split_after(iterable, pred, max_split=-1):
+    seq = _sliceable(iterable)
+    if seq is not None:
+        return _split_slices_after(seq, _split_points(iterable, seq, pred), max_split)
+    if not callable(pred):
+        pred = partial(eq, pred)
+    return _split_after(iterable, pred, max_split)
+
+
+def _split_slices_into(seq, sizes):
+    start = 0
+    for size in sizes:
+        if size is None:
+            yield seq[start:]
+            return
+        try:
+            size = index(size)
+        except TypeError:
+            size = -1
+        if size < 0:
+            raise ValueError('sizes must be None or non-negative integers')
+        yield seq[start:start + size]
+        start += size
+
+
+def _split_into(iterable, sizes):
     it = iter(iterable)
     for size in sizes:
         if size is None:
@@ -186,19 +503,212 @@ def split_into(iterable, sizes):
             yield list(islice(it, size))
 
 
-def map_if(iterable, pred, func, func_else=lambda x: x):
+def split_into(iterable, sizes):
+    seq = _sliceable(iterable)
+    if seq is not None:
+        return _split_slices_into(seq, sizes)
+    return _split_into(iterable, sizes)
+
+
+def _mmap_views(path, split, release_bytes):
+    with open(path, 'rb') as f:
+        if not fstat(f.fileno()).st_size:
+            return
+        mapped = mmap(f.fileno(), 0, access=ACCESS_READ)
+    try:
+        if hasattr(_mmap, 'MADV_SEQUENTIAL'):
+            mapped.madvise(_mmap.MADV_SEQUENTIAL)
+        dontneed = getattr(_mmap, 'MADV_DONTNEED', None)
+        released = offset = 0
+        for view in split(mapped):
+            yield view
+            offset += view.nbytes
+            if dontneed is not None and offset - released >= release_bytes:
+                end = offset - offset % PAGESIZE
+                mapped.madvise(dontneed, released, end - released)
+                released = end
+    finally:
+        try:
+            mapped.close()
+        except BufferError:
+            pass
+
+
+def mmap_chunks(path, n, release_bytes=1 << 26):
+    return _mmap_views(path, partial(_plain_chunked, n=n), release_bytes)
+
+
+def mmap_records(path, sep=b'\n', release_bytes=1 << 26):
+    return _mmap_views(path, partial(_plain_split_after, pred=sep), release_bytes)
+
+
+def _identity(x):
+    return x
+
+
+def _completed(pending, ordered, limit):
+    while len(pending) > limit:
+        if ordered:
+            yield pending.popleft().result()
+        else:
+            done = wait(pending, return_when=FIRST_COMPLETED).done
+            pending.difference_update(done)
+            for future in done:
+                yield future.result()
+
+
+def _executor_map(executor, fn, iterable, window, ordered=True):
+    pending = deque() if ordered else set()
+    submit = pending.append if ordered else pending.add
+    it = iter(iterable)
+    try:
+        while True:
+            try:
+                arg = next(it)
+            except StopIteration:
+                break
+            except Exception:
+                yield from _completed(pending, ordered, 0)
+                raise
+            submit(executor.submit(fn, arg))
+            yield from _completed(pending, ordered, window - 1)
+        yield from _completed(pending, ordered, 0)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _executor_window(executor, window):
+    if window is None:
+        return 2 * (getattr(executor, '_max_workers', None) or cpu_count() or 1)
+    if window < 1:
+        raise ValueError('window must be at least 1')
+    return window
+
+
+def _map_if_batch(pred, func, func_else, batch):
+    return [func(item) if pred(item) else func_else(item) for item in batch]
+
+
+def _map_if(iterable, pred, func, func_else):
     for item in iterable:
         yield func(item) if pred(item) else func_else(item)
 
 
+if _funcs is not None:
+    _map_if = _funcs.map_if
+
+
+def map_if(iterable, pred, func, func_else=_identity, *, executor=None, window=None, batch_size=1, ordered=True):
+    if executor is None:
+        return _map_if(iterable, pred, func, func_else)
+    window = _executor_window(executor, window)
+    if batch_size < 1:
+        raise ValueError('batch_size must be at least 1')
+    task = partial(_map_if_batch, pred, func, func_else)
+    batches = iter(partial(take, iter(iterable), batch_size), [])
+    return chain.from_iterable(_executor_map(executor, task, batches, window, ordered))
+
+
+def chunked_adaptive(iterable, n=None, *, max_bytes=None, max_seconds=None, sizeof=getsizeof):
+    if n is not None and n < 1:
+        raise ValueError('n must be None or at least 1')
+    chunk = []
+    size = 0
+    started = 0.0
+    for item in iterable:
+        if not chunk:
+            started = monotonic()
+        chunk.append(item)
+        if max_bytes is not None:
+            size += sizeof(item)
+        if (
+                (n is not None and len(chunk) >= n)
+                or (max_bytes is not None and size >= max_bytes)
+                or (max_seconds is not None and monotonic() - started >= max_seconds)
+        ):
+            yield chunk
+            chunk = []
+            size = 0
+    if chunk:
+        yield chunk
+
+
+def _picklable_chunk(chunk):
+    return chunk.tolist() if isinstance(chunk, memoryview) else chunk
+
+
+def map_chunked(iterable, n, func, *, executor, strict=False, window=None,
+                max_bytes=None, max_seconds=None, sizeof=getsizeof):
+    window = _executor_window(executor, window)
+    if max_bytes is None and max_seconds is None:
+        chunks = map(_picklable_chunk, _plain_chunked(iterable, n, strict))
+    elif strict:
+        raise ValueError('strict is only supported for count-based chunks')
+    else:
+        chunks = _plain_chunked_adaptive(iterable, n, max_bytes=max_bytes, max_seconds=max_seconds, sizeof=sizeof)
+    return _executor_map(executor, func, chunks, window)
+
+
+def _time_limited_put(queue, stopped, entry):
+    while not stopped.is_set():
+        try:
+            queue.put(entry, timeout=0.05)
+            return True
+        except Full:
+            pass
+    return False
+
+
+def _time_limited_produce(iterable, queue, stopped):
+    try:
+        for item in iterable:
+            if not _time_limited_put(queue, stopped, (True, item)):
+                return
+    except BaseException as e:
+        _time_limited_put(queue, stopped, (False, e))
+    else:
+        _time_limited_put(queue, stopped, (False, _marker))
+
+
 class time_limited:
-    def __init__(self, limit_seconds, iterable):
+    def __new__(cls, limit_seconds, iterable, preemptive=False, item_timeout=None, buffer_size=1):
+        if _funcs is not None and cls is time_limited and not preemptive and item_timeout is None:
+            return _funcs.time_limited.__new__(_time_limited_fast, limit_seconds, iterable)
+        return super().__new__(cls)
+
+    def __init__(self, limit_seconds, iterable, preemptive=False, item_timeout=None, buffer_size=1):
         if limit_seconds < 0:
             raise ValueError('limit_seconds must be positive')
+        if item_timeout is not None and not preemptive:
+            raise ValueError('item_timeout requires preemptive=True')
+        if preemptive and buffer_size < 1:
+            raise ValueError('buffer_size must be at least 1')
         self.limit_seconds = limit_seconds
+        self.item_timeout = item_timeout
         self._iterable = iter(iterable)
         self._start_time = monotonic()
         self.timed_out = False
+        self._queue = None
+        if preemptive and limit_seconds:
+            self._queue = Queue(maxsize=buffer_size)
+            self._stopped = Event()
+            Thread(target=_time_limited_produce, args=(self._iterable, self._queue, self._stopped), daemon=True).start()
+            finalize(self, self._stopped.set)
+
+    @property
+    def remaining(self):
+        return max(0.0, self.limit_seconds - (monotonic() - self._start_time))
+
+    def close(self):
+        if self._queue is not None:
+            self._stopped.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def __iter__(self):
         return self
@@ -207,6 +717,8 @@ class time_limited:
         if self.limit_seconds == 0:
             self.timed_out = True
             raise StopIteration
+        if self._queue is not None:
+            return self._next_preemptive()
         item = next(self._iterable)
         if monotonic() - self._start_time > self.limit_seconds:
             self.timed_out = True
@@ -214,8 +726,210 @@ class time_limited:
 
         return item
 
+    def _next_preemptive(self):
+        if self._stopped.is_set():
+            raise StopIteration
+        timeout = self.remaining
+        if self.item_timeout is not None:
+            timeout = min(timeout, self.item_timeout)
+        try:
+            ok, value = self._queue.get(timeout=timeout)
+        except Empty:
+            self._stopped.set()
+            self.timed_out = True
+            raise StopIteration
+        if ok:
+            return value
+        self._stopped.set()
+        if value is _marker:
+            raise StopIteration
+        raise value
+
+
+if _funcs is not None:
+    class _time_limited_fast(_funcs.time_limited, time_limited):
+        item_timeout = None
 
-def difference(iterable, func=sub, *, initial=None):
+        def __init__(self, *args, **kwargs):
+            pass
+
+
+class _ReplayBuffer:
+    def __init__(self, iterator, max_items, spill_dir):
+        self.iterator = iterator
+        self.max_items = max_items
+        self.limit = max_items or 1024
+        self.spill_dir = spill_dir
+        self.cursors = WeakSet()
+        self.memory = []
+        self.memory_start = 0
+        self.end = 0
+        self.segments = []
+        self.segment_starts = []
+        self.file = None
+        self.loaded = (None, None)
+
+    def pull(self):
+        item = next(self.iterator)
+        if len(self.cursors) > 1:
+            if not self.memory:
+                self.memory_start = self.end
+            self.memory.append(item)
+            if len(self.memory) > self.limit:
+                self.shrink()
+        elif self.memory:
+            self.shrink()
+        self.end += 1
+        return item
+
+    def get(self, position):
+        if position >= self.memory_start:
+            return self.memory[position - self.memory_start]
+        i = bisect_right(self.segment_starts, position) - 1
+        start, offset = self.segments[i]
+        loaded_start, items = self.loaded
+        if loaded_start != start:
+            self.file.seek(offset)
+            items = pickle.load(self.file)
+            self.loaded = (start, items)
+        return items[position - start]
+
+    def shrink(self):
+        low = min((c._position for c in self.cursors), default=self.end)
+        released = bisect_right(self.segment_starts[1:] + [self.memory_start], low)
+        if released and self.segments:
+            del self.segments[:released], self.segment_starts[:released]
+            self.loaded = (None, None)
+            if not self.segments:
+                self.file.seek(0)
+                self.file.truncate()
+        if low > self.memory_start:
+            del self.memory[:low - self.memory_start]
+            self.memory_start = low
+        if self.max_items is None:
+            self.limit = max(1024, 2 * len(self.memory))
+        elif len(self.memory) > self.max_items:
+            n = len(self.memory) // 2
+            if self.file is None:
+                self.file = TemporaryFile(dir=self.spill_dir)
+            offset = self.file.seek(0, 2)
+            pickle.dump(self.memory[:n], self.file, pickle.HIGHEST_PROTOCOL)
+            self.segments.append((self.memory_start, offset))
+            self.segment_starts.append(self.memory_start)
+            del self.memory[:n]
+            self.memory_start += n
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.memory.clear()
+        self.segments.clear()
+        self.segment_starts.clear()
+
+
+class replayable:
+    __slots__ = ('_buffer', '_position', '_pushed', '__weakref__')
+
+    def __init__(self, iterable, *, max_items=65536, spill_dir=None):
+        if max_items is not None and max_items < 1:
+            raise ValueError('max_items must be at least 1')
+        self._buffer = _ReplayBuffer(iter(iterable), max_items, spill_dir)
+        self._buffer.cursors.add(self)
+        self._position = 0
+        self._pushed = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._pushed:
+            return self._pushed.pop()
+        buffer = self._buffer
+        if self._position == buffer.end:
+            item = buffer.pull()
+        else:
+            item = buffer.get(self._position)
+        self._position += 1
+        return item
+
+    def peek(self, default=_marker):
+        if not self._pushed:
+            try:
+                self._pushed.append(next(self))
+            except StopIteration:
+                if default is _marker:
+                    raise
+                return default
+        return self._pushed[-1]
+
+    def prepend(self, *items):
+        self._pushed.extend(reversed(items))
+
+    def cursor(self):
+        other = object.__new__(replayable)
+        other._buffer = self._buffer
+        other._position = self._position
+        other._pushed = self._pushed.copy()
+        self._buffer.cursors.add(other)
+        return other
+
+    def close(self):
+        self._buffer.close()
+
+
+def _as_ufunc(func):
+    if np is None:
+        return None
+    if isinstance(func, np.ufunc):
+        return func if func.nin == 2 else None
+    return {sub: np.subtract, add: np.add, mul: np.multiply}.get(func)
+
+
+def _numeric_view(block, ufunc):
+    arr = np.asarray(block)
+    kind = arr.dtype.kind
+    if kind == 'f':
+        return arr.astype(np.float64, copy=False)
+    if kind in 'iu':
+        small = arr.max() < 2 ** 62 and arr.min() > -2 ** 62
+        if small and ufunc in (np.subtract, np.add):
+            return arr.astype(np.int64, copy=False)
+        return arr.astype(object)
+    return None
+
+
+def _difference_blocks(iterable, func, initial, block_size):
+    ufunc = _as_ufunc(func)
+    native = ufunc is not None and isinstance(iterable, np.ndarray)
+    if native:
+        blocks = (iterable[i:i + block_size] for i in range(0, len(iterable), block_size))
+    else:
+        blocks = _plain_chunked(iterable, block_size)
+    previous = _marker
+    for block in blocks:
+        if previous is not _marker:
+            yield [func(block[0], previous)]
+        elif initial is None:
+            yield [block[0]]
+        if native:
+            yield ufunc(block[1:], block[:-1])
+        elif ufunc is not None and isinstance(block, memoryview):
+            arr = _numeric_view(block, ufunc)
+            if arr is None:
+                yield map(func, block[1:], block)
+            else:
+                yield ufunc(arr[1:], arr[:-1]).tolist()
+        else:
+            yield map(func, block[1:], block)
+        previous = block[-1]
+
+
+def difference(iterable, func=sub, *, initial=None, vectorize=False, block_size=65536):
+    if vectorize:
+        if block_size < 1:
+            raise ValueError('block_size must be at least 1')
+        return chain.from_iterable(_difference_blocks(iterable, func, initial, block_size))
     a, b = tee(iterable)
     try:
         first = [next(b)]
@@ -227,28 +941,980 @@ def difference(iterable, func=sub, *, initial=None):
     return chain(first, starmap(func, zip(b, a)))
 
 
-def value_chain(*args):
-    for value in args:
-        if isinstance(value, (str, bytes)):
+def _shard_array(source, numeric=True):
+    if isinstance(source, tuple):
+        filename, dtype, offset, shape = source
+        return np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=shape)
+    if np is not None and numeric:
+        return np.frombuffer(source._target, dtype=source._target.format)
+    return source._target
+
+
+def _shard_difference(source, output, func, shift, lo, hi):
+    ufunc = _as_ufunc(func)
+    x = out = None
+    try:
+        x = _shard_array(source, ufunc is not None)
+        out = _shard_array(output, ufunc is not None)
+        start = max(lo, 1)
+        if lo == 0 and not shift:
+            out[0] = x[0]
+        if ufunc is not None:
+            ufunc(x[start:hi], x[start - 1:hi - 1], out=out[start + shift:hi + shift], dtype=out.dtype)
+        else:
+            out[start + shift:hi + shift] = array(output._target.format, map(func, x[start:hi], x[start - 1:hi - 1]))
+    finally:
+        del x, out
+
+
+def _shard_scan(source, output, func, shift, lo, hi):
+    ufunc = _as_ufunc(func)
+    x = out = None
+    try:
+        x = _shard_array(source, ufunc is not None)
+        out = _shard_array(output, ufunc is not None)
+        if ufunc is not None:
+            ufunc.accumulate(x[lo:hi], dtype=out.dtype, out=out[lo + shift:hi + shift])
+        else:
+            out[lo + shift:hi + shift] = array(output._target.format, accumulate(x[lo:hi], func))
+        return out[hi + shift - 1]
+    finally:
+        del x, out
+
+
+def _shard_offset(output, func, shift, lo, hi, carry):
+    ufunc = _as_ufunc(func)
+    out = None
+    try:
+        out = _shard_array(output, ufunc is not None)
+        if ufunc is not None:
+            ufunc(carry, out[lo + shift:hi + shift], out=out[lo + shift:hi + shift])
+        else:
+            out[lo + shift:hi + shift] = array(output._target.format, map(partial(func, carry), out[lo + shift:hi + shift]))
+    finally:
+        del out
+
+
+def _shared_block(format, length):
+    shm = SharedMemory(create=True, size=max(length, 1) * calcsize(format))
+    view = object.__new__(SharedSequenceView)
+    view._target = _shared_target(shm, format, length, True)
+    view._window = None
+    view._shm = shm
+    view._owner = True
+    return view
+
+
+def _share_input(data):
+    if np is not None and isinstance(data, np.memmap) and isinstance(data.base, mmap) and data.ndim == 1:
+        return (data.filename, data.dtype.str, data.offset, data.shape), None
+    if isinstance(data, SharedSequenceView):
+        return data, None
+    view = SharedSequenceView(data)
+    return view, view
+
+
+def _discard_shared(view):
+    try:
+        view.close()
+    finally:
+        view.unlink()
+
+
+def _scan_format(kind, x, ufunc, initial):
+    if ufunc is None:
+        format = x.format if isinstance(x, memoryview) else x.dtype.char
+        return 'q' if format in 'bBhHiIlLqQ?' else format
+    if x.dtype.kind not in 'biu':
+        return ufunc(x[:1], x[:1]).dtype.char
+    bound = max(abs(int(x.min())), abs(int(x.max())))
+    if ufunc is np.multiply:
+        fits = bound < 2 ** 31 if kind == 'difference' else bound <= 1 or len(x) * bound.bit_length() < 63
+    elif ufunc in (np.add, np.subtract):
+        fits = bound < 2 ** 62 if kind == 'difference' else bound * len(x) + abs(initial or 0) < 2 ** 63
+    else:
+        fits = bound < 2 ** 63
+    if not fits:
+        raise OverflowError(f'{kind} of this input does not fit the int64 output')
+    return 'q'
+
+
+def _run_shards(executor, fn, *iterables):
+    futures = list(map(executor.submit, repeat(fn), *iterables))
+    try:
+        return [future.result() for future in futures]
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        raise
+
+
+def _parallel_scan(kind, data, func, initial, executor, shards):
+    if shards is not None and shards < 1:
+        raise ValueError('shards must be at least 1')
+    if len(data) == 0:
+        return data[:0]
+    source, owned = _share_input(data)
+    output = x = None
+    try:
+        ufunc = _as_ufunc(func)
+        x = _shard_array(source, ufunc is not None)
+        length = len(x)
+        format = _scan_format(kind, x, ufunc, initial)
+        x = None
+        shift = -1 if kind == 'difference' and initial is not None else int(kind == 'accumulate' and initial is not None)
+        output = _shared_block(format, length + shift)
+        if shards is None:
+            shards = 4 * (getattr(executor, '_max_workers', None) or cpu_count() or 1)
+        size = -(-length // shards)
+        los = range(0, length, size)
+        his = [min(lo + size, length) for lo in los]
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor()
+        try:
+            if kind == 'difference':
+                _run_shards(executor, partial(_shard_difference, source, output, func, shift), los, his)
+            else:
+                if initial is not None:
+                    _shard_array(output, ufunc is not None)[0] = initial
+                totals = _run_shards(executor, partial(_shard_scan, source, output, func, shift), los, his)
+                carries = [initial]
+                for total in totals[:-1]:
+                    carries.append(total if carries[-1] is None else func(carries[-1], total))
+                jobs = [(lo, hi, carry) for lo, hi, carry in zip(los, his, carries) if carry is not None]
+                if jobs:
+                    _run_shards(executor, partial(_shard_offset, output, func, shift), *zip(*jobs))
+        finally:
+            if own_executor:
+                executor.shutdown()
+        if np is not None and isinstance(data, np.ndarray):
+            return np.frombuffer(output._target, dtype=format).copy()
+        result = array(format)
+        result.frombytes(output._target.cast('B'))
+        return result
+    except BaseException as e:
+        clear_frames(e.__traceback__)
+        raise
+    finally:
+        x = None
+        try:
+            if output is not None:
+                _discard_shared(output)
+        finally:
+            if owned is not None:
+                _discard_shared(owned)
+
+
+def parallel_difference(data, func=sub, *, initial=None, executor=None, shards=None):
+    return _parallel_scan('difference', data, func, initial, executor, shards)
+
+
+def parallel_accumulate(data, func=add, *, initial=None, executor=None, shards=None):
+    return _parallel_scan('accumulate', data, func, initial, executor, shards)
+
+
+class _QuantileSketch:
+    def __init__(self, k, seed=None):
+        self.k = k
+        self.levels = [[]]
+        self._random = Random(seed)
+
+    def update(self, values):
+        self.levels[0] += values
+        self._compress()
+
+    def merge(self, other):
+        for height, level in enumerate(other.levels):
+            if height == len(self.levels):
+                self.levels.append([])
+            self.levels[height] += level
+        self._compress()
+
+    def _compress(self):
+        height = 0
+        while height < len(self.levels):
+            level = self.levels[height]
+            if len(level) > self.k:
+                level.sort()
+                kept = [level.pop()] if len(level) % 2 else []
+                if height + 1 == len(self.levels):
+                    self.levels.append([])
+                self.levels[height + 1] += level[self._random.getrandbits(1)::2]
+                self.levels[height] = kept
+            height += 1
+
+    def quantile(self, q):
+        weighted = sorted(
+            (value, 1 << height) for height, level in enumerate(self.levels) for value in level
+        )
+        if not weighted:
+            return None
+        rank = q * sum(map(itemgetter(1), weighted))
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= rank:
+                return value
+        return weighted[-1][0]
+
+
+class RunningStats:
+    def __init__(self, iterable=None, *, quantiles=(0.5, 0.9, 0.99), sketch_size=256, block_size=4096, seed=None):
+        if sketch_size < 2 or block_size < 1:
+            raise ValueError('sketch_size must be at least 2 and block_size at least 1')
+        self.quantiles = quantiles
+        self.block_size = block_size
+        self.count = 0
+        self.total = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self._m2 = 0.0
+        self._sketch = _QuantileSketch(sketch_size, seed)
+        if iterable is not None:
+            self.update(iterable)
+
+    def _combine(self, count, total, mean, m2, low, high):
+        combined = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / combined
+        self._m2 += m2 + delta * delta * self.count * count / combined
+        self.count = combined
+        self.total += total
+        self.min = low if self.min is None or low < self.min else self.min
+        self.max = high if self.max is None or high > self.max else self.max
+
+    def _add_block(self, block):
+        values = list(map(float, block))
+        count = len(values)
+        total = sum(block)
+        mean = sum(values) / count
+        deviations = list(map(sub, values, repeat(mean)))
+        self._combine(count, total, mean, sum(map(mul, deviations, deviations)), min(block), max(block))
+        self._sketch.update(block)
+
+    def _add_array(self, block):
+        mean = block.mean()
+        deviations = block - mean
+        total = block.sum().item()
+        self._combine(block.size, total, mean.item(), float(deviations @ deviations), block.min().item(), block.max().item())
+        self._sketch.update(block.tolist())
+
+    def update(self, iterable):
+        if np is not None and isinstance(iterable, np.ndarray):
+            iterable = iterable.ravel()
+            for start in range(0, iterable.size, self.block_size):
+                self._add_array(iterable[start:start + self.block_size])
+            return self
+        for block in iter(partial(take, iter(iterable), self.block_size), []):
+            self._add_block(block)
+        return self
+
+    def add(self, value):
+        self._add_block([value])
+        return self
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.total, other.mean, other._m2, other.min, other.max)
+            self._sketch.merge(other._sketch)
+        return self
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def pvariance(self):
+        return self._m2 / self.count if self.count else None
+
+    def quantile(self, q):
+        if not 0 <= q <= 1:
+            raise ValueError('q must be between 0 and 1')
+        return self._sketch.quantile(q)
+
+    def snapshot(self):
+        variance = self.variance
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.mean if self.count else None,
+            'variance': variance,
+            'stdev': None if variance is None else sqrt(variance),
+            'min': self.min,
+            'max': self.max,
+            'quantiles': {q: self.quantile(q) for q in self.quantiles},
+        }
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(count={self.count}, mean={self.mean if self.count else None})'
+
+
+def _windows(iterable, n, step, view):
+    it = iter(iterable)
+    window = deque(islice(it, n), maxlen=n)
+    if len(window) < n:
+        return
+    emit = repeat(SequenceView(window)).__next__ if view else partial(tuple, window)
+    yield emit()
+    if step == 1:
+        for item in it:
+            window.append(item)
+            yield emit()
+        return
+    while True:
+        items = list(islice(it, step))
+        if len(items) < step:
+            return
+        window.extend(items)
+        yield emit()
+
+
+def _window_slices(seq, n, step):
+    size = len(seq)
+    if isinstance(seq, memoryview):
+        seq = seq.toreadonly()
+    elif isinstance(seq, list):
+        seq = SequenceView(seq)
+    return map(seq.__getitem__, map(slice, range(0, size - n + 1, step), range(n, size + 1, step)))
+
+
+def _rolling_sum(iterable, n, step):
+    it = iter(iterable)
+    window = deque(islice(it, n), maxlen=n)
+    if len(window) < n:
+        return
+    total = sum(window)
+    yield total
+    pending = step
+    for item in it:
+        total += item - window[0]
+        window.append(item)
+        pending -= 1
+        if not pending:
+            pending = step
+            yield total
+
+
+def _rolling_extreme(iterable, n, step, better):
+    candidates = deque()
+    emit_at = n - 1
+    for i, item in enumerate(iterable):
+        while candidates and not better(candidates[-1][1], item):
+            candidates.pop()
+        candidates.append((i, item))
+        if candidates[0][0] <= i - n:
+            candidates.popleft()
+        if i == emit_at:
+            emit_at += step
+            yield candidates[0][1]
+
+
+def _rolling_array(arr, n, step, aggregate):
+    size = len(arr)
+    if size < n:
+        return arr[:0]
+    if aggregate == 'sum':
+        totals = np.cumsum(arr)
+        return np.concatenate((totals[n - 1:n], totals[n:] - totals[:-n]))[::step]
+    op = np.minimum if aggregate == 'min' else np.maximum
+    blocks = np.concatenate((arr, np.repeat(arr[-1:], -size % n))).reshape(-1, n)
+    prefix = op.accumulate(blocks, axis=1).ravel()
+    suffix = op.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return op(suffix[:size - n + 1:step], prefix[n - 1:size:step])
+
+
+def windowed(iterable, n, step=1, *, view=False, aggregate=None):
+    if n < 1 or step < 1:
+        raise ValueError('n and step must be at least 1')
+    if aggregate not in (None, 'sum', 'min', 'max'):
+        raise ValueError("aggregate must be None, 'sum', 'min' or 'max'")
+    if view and aggregate is not None:
+        raise ValueError('view and aggregate cannot be combined')
+    is_vector = np is not None and isinstance(iterable, np.ndarray) and iterable.ndim == 1
+    if aggregate is not None:
+        if is_vector:
+            return _rolling_array(iterable, n, step, aggregate)
+        if aggregate == 'sum':
+            return _rolling_sum(iterable, n, step)
+        return _rolling_extreme(iterable, n, step, le if aggregate == 'min' else ge)
+    if view:
+        if is_vector:
+            if len(iterable) < n:
+                return iterable[:0].reshape(0, n)
+            return np.lib.stride_tricks.sliding_window_view(iterable, n)[::step]
+        seq = _sliceable(iterable)
+        if seq is not None:
+            return _window_slices(seq, n, step)
+    return _windows(iterable, n, step, view)
+
+
+_iterable_types = {
+    str: False, bytes: False, list: True, tuple: True, dict: True, set: True, frozenset: True,
+    range: True, bytearray: True, deque: True,
+}
+
+
+def _probe_iterable(value):
+    cls = type(value)
+    if issubclass(cls, (str, bytes)) or not (hasattr(cls, '__iter__') or hasattr(cls, '__getitem__')):
+        if len(_iterable_types) < 4096:
+            _iterable_types[cls] = False
+        return False
+    return None
+
+
+def _checked_iter(value):
+    try:
+        it = iter(value)
+        first = next(it)
+    except StopIteration:
+        return iter(())
+    except TypeError:
+        return None
+    return chain((first,), it)
+
+
+def _value_iter(value):
+    if _probe_iterable(value) is False:
+        return None
+    return _checked_iter(value)
+
+
+def _value_chain_runs(values, depth):
+    flags = list(map(_iterable_types.get, map(type, values)))
+    checked = None in flags
+    if checked:
+        flags = [_probe_iterable(value) if flag is None else flag for value, flag in zip(values, flags)]
+        checked = None in flags
+    if depth == 0 or (True not in flags and not checked):
+        yield values
+        return
+    inner = None if depth is None else depth - 1
+    if checked or 8 * sum(map(ne, flags, islice(flags, 1, None))) > len(flags):
+        yield _chain_flagged(values, flags, inner)
+        return
+    start = 0
+    for flag, run in groupby(flags):
+        stop = start + len(list(run))
+        block = values[start:stop]
+        start = stop
+        if not flag:
+            yield block
+        elif inner == 0:
+            yield chain.from_iterable(block)
+        else:
+            yield chain.from_iterable(map(_flatten, block, repeat(inner)))
+
+
+def _chain_flagged(values, flags, depth):
+    for value, flag in zip(values, flags):
+        if flag is None:
+            it = _checked_iter(value)
+            if it is None:
+                yield value
+                continue
+        elif flag:
+            it = value
+        else:
             yield value
             continue
+        if depth == 0:
+            yield from it
+        else:
+            yield from _flatten(it, depth)
+
+
+def _flatten(iterable, depth):
+    runs = map(_value_chain_runs, _plain_chunked(iterable, 1024), repeat(depth))
+    return chain.from_iterable(chain.from_iterable(runs))
+
+
+def value_chain(*args, max_depth=1):
+    if max_depth is not None and max_depth < 0:
+        raise ValueError('max_depth must be None or at least 0')
+    return chain.from_iterable(_value_chain_runs(args, max_depth))
+
+
+def _seq_find(target, value, start, stop):
+    if isinstance(target, (list, tuple, deque, array)):
         try:
-            yield from value
-        except TypeError:
-            yield value
+            if isinstance(target, array) and version_info < (3, 10):
+                return target[start:stop].index(value) + start
+            return target.index(value, start, stop)
+        except ValueError:
+            return -1
+    if isinstance(target, (bytes, bytearray, mmap)) and type(value) in (int, bool):
+        if not 0 <= value < 256:
+            return -1
+        return target.find(bytes((value,)), start, stop)
+    if isinstance(target, str) and type(value) is str and len(value) == 1:
+        return target.find(value, start, stop)
+    return None
+
+
+def _seq_count(target, value, start, stop):
+    if isinstance(target, (list, tuple, deque, array)) and start == 0 and stop == len(target):
+        return target.count(value)
+    if isinstance(target, (bytes, bytearray)) and type(value) in (int, bool):
+        return target.count(value, start, stop) if 0 <= value < 256 else 0
+    if isinstance(target, str) and type(value) is str and len(value) == 1:
+        return target.count(value, start, stop)
+    return None
 
 
 class SequenceView(Sequence):
     def __init__(self, target):
-        if not isinstance(target, Sequence):
+        if not isinstance(target, (Sequence, mmap)):
             raise TypeError
         self._target = target
+        self._window = None
+
+    def _indices(self):
+        if self._window is None:
+            return range(len(self._target))
+        return self._window
+
+    def _view(self, window):
+        view = object.__new__(self.__class__)
+        view.__dict__.update(self.__dict__)
+        view._window = window
+        return view
 
     def __getitem__(self, index):
-        return self._target[index]
+        if isinstance(index, slice):
+            return self._view(self._indices()[index])
+        if self._window is None:
+            return self._target[index]
+        return self._target[self._window[index]]
 
     def __len__(self):
-        return len(self._target)
+        if self._window is None:
+            return len(self._target)
+        return len(self._window)
+
+    def __iter__(self):
+        if self._window is None:
+            return iter(self._target)
+        return map(self._target.__getitem__, self._window)
+
+    def __reversed__(self):
+        if self._window is None:
+            return reversed(self._target)
+        return map(self._target.__getitem__, reversed(self._window))
+
+    def __contains__(self, value):
+        return self._find(value, 0, None) is not None
+
+    def _find(self, value, start, stop):
+        indices = self._indices()
+        window = indices[start:stop]
+        if window.step == 1:
+            position = _seq_find(self._target, value, window.start, window.stop)
+            if position is not None:
+                return None if position < 0 else (position - indices.start) // indices.step
+        try:
+            position = indexOf(map(self._target.__getitem__, window), value)
+        except ValueError:
+            return None
+        return (window[position] - indices.start) // indices.step
+
+    def index(self, value, start=0, stop=None):
+        position = self._find(value, start, stop)
+        if position is None:
+            raise ValueError
+        return position
+
+    def count(self, value):
+        window = self._indices()
+        if window.step == 1:
+            total = _seq_count(self._target, value, window.start, window.stop)
+            if total is not None:
+                return total
+        return countOf(map(self._target.__getitem__, window), value)
+
+    def __repr__(self):
+        if self._window is None:
+            return f"{self.__class__.__name__}({self._target})"
+        return f"{self.__class__.__name__}({self._target}, {self._window})"
+
+
+def _release_segment(shm, target, unlink):
+    target = target()
+    if target is not None:
+        target.release()
+    shm.close()
+    if unlink:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _shared_target(shm, format, length, owner):
+    target = shm.buf.cast(format)[:length]
+    finalize(target, _release_segment, shm, ref(target), owner)
+    return target
+
+
+def _attach_shared_view(name, format, length, window):
+    shm = SharedMemory(name, **({'track': False} if version_info >= (3, 13) else {}))
+    view = object.__new__(SharedSequenceView)
+    view._target = _shared_target(shm, format, length, False)
+    view._window = window
+    view._shm = shm
+    view._owner = False
+    return view
+
+
+class SharedSequenceView(SequenceView):
+    def __init__(self, data):
+        if np is not None and isinstance(data, np.ndarray):
+            if data.ndim != 1:
+                raise ValueError('only one-dimensional arrays can be shared')
+            data = memoryview(np.ascontiguousarray(data))
+        elif isinstance(data, (bytes, bytearray, memoryview, array)):
+            data = memoryview(data)
+        else:
+            raise TypeError('data must be bytes-like, an array.array or a NumPy array')
+        if data.ndim != 1:
+            raise ValueError('only one-dimensional buffers can be shared')
+        shm = SharedMemory(create=True, size=max(data.nbytes, 1))
+        self._target = _shared_target(shm, data.format, len(data), True)
+        self._target[:] = data
+        self._window = None
+        self._shm = shm
+        self._owner = True
+
+    def _view(self, window):
+        view = super()._view(window)
+        view._owner = False
+        return view
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __reduce__(self):
+        if self._target is None:
+            raise ValueError('cannot pickle a closed SharedSequenceView')
+        return _attach_shared_view, (self._shm.name, self._target.format, len(self._target), self._window)
+
+    def close(self):
+        self._target = None
+
+    def unlink(self):
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._owner = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    def __repr__(self):
+        if self._window is None:
+            return f"{self.__class__.__name__}({self._shm.name!r})"
+        return f"{self.__class__.__name__}({self._shm.name!r}, {self._window})"
+
+
+_FUSED_PARAMS = {
+    'map': ('f',), 'filter': ('p',), 'map_if': ('p', 'f', 'g'), 'value_chain': ('flags', 'probe'), 'split_after': ('p', 'left'),
+}
+
+
+def _fused_body(kinds, k, var, depth):
+    pad = '    ' * depth
+    if k == len(kinds):
+        return [f'{pad}yield {var}']
+    kind = kinds[k]
+    out = f'x{k + 1}'
+    if kind == 'map':
+        return [f'{pad}{out} = f{k}({var})', *_fused_body(kinds, k + 1, out, depth)]
+    if kind == 'filter':
+        return [f'{pad}if p{k}({var}):', *_fused_body(kinds, k + 1, var, depth + 1)]
+    if kind == 'map_if':
+        return [f'{pad}{out} = f{k}({var}) if p{k}({var}) else g{k}({var})', *_fused_body(kinds, k + 1, out, depth)]
+    if kind == 'value_chain':
+        return [
+            f'{pad}flag{k} = flags{k}(type({var}))',
+            f'{pad}it{k} = {var} if flag{k} else None if flag{k} is False else probe{k}({var})',
+            f'{pad}if it{k} is None:',
+            *_fused_body(kinds, k + 1, var, depth + 1),
+            f'{pad}else:',
+            f'{pad}    for {out} in it{k}:',
+            *_fused_body(kinds, k + 1, out, depth + 2),
+        ]
+    return [
+        f'{pad}buf{k}.append({var})',
+        f'{pad}if left{k} and p{k}({var}):',
+        f'{pad}    {out} = buf{k}',
+        f'{pad}    buf{k} = []',
+        f'{pad}    left{k} -= 1',
+        *_fused_body(kinds, k + 1, out, depth + 1),
+    ]
+
+
+@lru_cache(maxsize=None)
+def _fused(kinds):
+    params = ''.join(f', {name}{k}' for k, kind in enumerate(kinds) for name in _FUSED_PARAMS[kind])
+    splits = [k for k, kind in enumerate(kinds) if kind == 'split_after']
+    lines = [f'def fused(x0{params}):']
+    lines += [f'    buf{k} = []' for k in splits]
+    lines.append('    for x0 in x0:')
+    lines += _fused_body(kinds, 0, 'x0', 2)
+    for k in splits:
+        lines.append(f'    if buf{k} or not left{k}:')
+        lines += _fused_body(kinds, k + 1, f'buf{k}', 2)
+    namespace = {}
+    exec(compile('\n'.join(lines), f'<fused {"-".join(kinds)}>', 'exec'), namespace)
+    return namespace['fused']
+
+
+def _apply_stage(iterable, kind, args):
+    if kind == 'map':
+        return map(args[0], iterable)
+    if kind == 'filter':
+        return filter(args[0], iterable)
+    if kind == 'map_if':
+        return _map_if(iterable, *args)
+    if kind == 'chunked':
+        return _plain_chunked(iterable, *args)
+    if kind == 'split_after':
+        return _plain_split_after(iterable, *args)
+    if kind == 'value_chain':
+        return _flatten(iterable, 1)
+    func, func_args, func_kwargs = args
+    return func(iterable, *func_args, **func_kwargs)
+
+
+def _apply_run(iterable, run, python_kinds):
+    if len(run) < 2 or not any(kind in python_kinds for kind, _ in run):
+        for kind, args in run:
+            iterable = _apply_stage(iterable, kind, args)
+        return iterable
+    params = []
+    for kind, args in run:
+        if kind == 'split_after' and not callable(args[0]):
+            args = (partial(eq, args[0]), args[1])
+        params += args
+    return _fused(tuple(kind for kind, _ in run))(iterable, *params)
+
+
+class Pipeline:
+    def __init__(self, source, stages=()):
+        self._source = source
+        self._stages = stages
+
+    def _then(self, kind, *args):
+        return self.__class__(self._source, self._stages + ((kind, args),))
+
+    def map(self, func):
+        return self._then('map', func)
+
+    def filter(self, pred):
+        return self._then('filter', pred)
+
+    def map_if(self, pred, func, func_else=_identity, **kwargs):
+        if kwargs:
+            return self.apply(_plain_map_if, pred, func, func_else, **kwargs)
+        return self._then('map_if', pred, func, func_else)
+
+    def value_chain(self, max_depth=1):
+        if max_depth != 1:
+            return self.apply(_flatten, max_depth)
+        return self._then('value_chain', _iterable_types.get, _value_iter)
+
+    def chunked(self, n, strict=False):
+        return self._then('chunked', n, strict)
+
+    def split_after(self, pred, max_split=-1):
+        return self._then('split_after', pred, max_split)
+
+    def apply(self, func, *args, **kwargs):
+        return self._then('apply', func, args, kwargs)
+
+    def __iter__(self):
+        python_kinds = ('value_chain',) if _funcs is not None else ('value_chain', 'map_if', 'split_after')
+        iterable = self._source
+        run = []
+        for kind, args in self._stages:
+            if kind in ('map', 'filter') or kind in python_kinds:
+                if kind == 'split_after' and not run and iterable is self._source and _sliceable(iterable) is not None:
+                    iterable = _plain_split_after(iterable, *args)
+                else:
+                    run.append((kind, args))
+                continue
+            iterable = _apply_stage(_apply_run(iterable, run, python_kinds), kind, args)
+            run = []
+        return iter(_apply_run(iterable, run, python_kinds))
 
     def __repr__(self):
-        return f"{self.__class__.__name__}({self._target})"
+        stages = ''.join(f'.{kind}(...)' for kind, _ in self._stages)
+        return f'{self.__class__.__name__}({self._source!r}){stages}'
+
+
+_plain_chunked = chunked
+_plain_chunked_adaptive = chunked_adaptive
+_plain_split_after = split_after
+_plain_map_if = map_if
+_INSTRUMENTABLE = (
+    'chunked', 'chunked_adaptive', 'map_chunked', 'map_if', 'split_after',
+    'split_into', 'difference', 'repeat_each',
+)
+_CALLBACKS = ('pred', 'func', 'func_else')
+_LATENCY_BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, float('inf'))
+_originals = {}
+_metrics = {}
+
+
+class _HelperMetrics:
+    __slots__ = ('calls', 'items', 'next_seconds', 'upstream_seconds', 'callback_seconds', 'buckets')
+
+    def __init__(self):
+        self.calls = self.items = 0
+        self.next_seconds = self.upstream_seconds = self.callback_seconds = 0.0
+        self.buckets = [0] * len(_LATENCY_BUCKETS)
+
+
+class _TimedUpstream:
+    __slots__ = ('_iterator', '_metrics')
+
+    def __init__(self, iterable, metrics):
+        self._iterator = iter(iterable)
+        self._metrics = metrics
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = perf_counter()
+        try:
+            return next(self._iterator)
+        finally:
+            self._metrics.upstream_seconds += perf_counter() - start
+
+
+class _TimedCallback:
+    __slots__ = ('_func', '_metrics')
+
+    def __init__(self, func, metrics):
+        self._func = func
+        self._metrics = metrics
+
+    def __call__(self, *args):
+        start = perf_counter()
+        try:
+            return self._func(*args)
+        finally:
+            self._metrics.callback_seconds += perf_counter() - start
+
+
+class _TimedOutput:
+    __slots__ = ('_iterator', '_metrics')
+
+    def __init__(self, iterator, metrics):
+        self._iterator = iterator
+        self._metrics = metrics
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = perf_counter()
+        item = next(self._iterator)
+        elapsed = perf_counter() - start
+        metrics = self._metrics
+        metrics.items += 1
+        metrics.next_seconds += elapsed
+        metrics.buckets[bisect_left(_LATENCY_BUCKETS, elapsed)] += 1
+        return item
+
+
+def _instrumented(name, helper):
+    signature = inspect.signature(helper)
+
+    @wraps(helper)
+    def wrapper(*args, **kwargs):
+        metrics = _metrics.get(name)
+        if metrics is None:
+            metrics = _metrics[name] = _HelperMetrics()
+        metrics.calls += 1
+        bound = signature.bind(*args, **kwargs)
+        arguments = bound.arguments
+        if _sliceable(arguments['iterable']) is None:
+            arguments['iterable'] = _TimedUpstream(arguments['iterable'], metrics)
+        if arguments.get('executor') is None:
+            for key in _CALLBACKS:
+                if callable(arguments.get(key)) and _as_ufunc(arguments[key]) is None:
+                    arguments[key] = _TimedCallback(arguments[key], metrics)
+        result = helper(*bound.args, **bound.kwargs)
+        iterator = iter(result)
+        if iterator is not result:
+            metrics.items += len(result)
+            return result
+        return _TimedOutput(iterator, metrics)
+
+    return wrapper
+
+
+def instrument(*names):
+    for name in names or _INSTRUMENTABLE:
+        if name not in _INSTRUMENTABLE:
+            raise ValueError(f'{name} cannot be instrumented')
+        if name not in _originals:
+            _originals[name] = globals()[name]
+            globals()[name] = _instrumented(name, _originals[name])
+
+
+def uninstrument(*names):
+    for name in names or tuple(_originals):
+        if name in _originals:
+            globals()[name] = _originals.pop(name)
+
+
+def reset_metrics():
+    _metrics.clear()
+
+
+def metrics_snapshot():
+    snapshot = {}
+    for name, metrics in _metrics.items():
+        snapshot[name] = {
+            'calls': metrics.calls,
+            'items': metrics.items,
+            'next_seconds': metrics.next_seconds,
+            'upstream_seconds': metrics.upstream_seconds,
+            'callback_seconds': metrics.callback_seconds,
+            'own_seconds': max(0.0, metrics.next_seconds - metrics.upstream_seconds - metrics.callback_seconds),
+            'latency_buckets': dict(zip(_LATENCY_BUCKETS, metrics.buckets)),
+        }
+    return snapshot
+
+
+def metrics_text(prefix='funcs_helper'):
+    lines = []
+    counters = ('calls', 'items', 'upstream_seconds', 'callback_seconds')
+    snapshot = metrics_snapshot()
+    for counter in counters:
+        lines.append(f'# TYPE {prefix}_{counter}_total counter')
+        for name, values in snapshot.items():
+            lines.append(f'{prefix}_{counter}_total{{helper="{name}"}} {values[counter]}')
+    lines.append(f'# TYPE {prefix}_next_seconds histogram')
+    for name, values in snapshot.items():
+        cumulative = 0
+        for bound, bucket in values['latency_buckets'].items():
+            cumulative += bucket
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{prefix}_next_seconds_bucket{{helper="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'{prefix}_next_seconds_sum{{helper="{name}"}} {values["next_seconds"]}')
+        lines.append(f'{prefix}_next_seconds_count{{helper="{name}"}} {values["items"]}')
+    return '\n'.join(lines) + '\n'
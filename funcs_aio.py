@@ -0,0 +1,277 @@
+import asyncio
+from inspect import isawaitable
+from operator import sub, eq
+from functools import partial
+from time import monotonic
+from sys import version_info
+
+import funcs
+from funcs import _marker
+
+if version_info < (3, 10):
+    def aiter(iterable):
+        return type(iterable).__aiter__(iterable)
+
+    async def anext(iterator):
+        return await type(iterator).__anext__(iterator)
+
+
+def _aiter(iterable):
+    if hasattr(iterable, '__aiter__'):
+        return aiter(iterable)
+    return _from_iterable(iterable)
+
+
+async def _from_iterable(iterable):
+    for item in iterable:
+        yield item
+
+
+async def _resolve(value):
+    if isawaitable(value):
+        return await value
+    return value
+
+
+def _loop_time():
+    try:
+        return asyncio.get_running_loop().time()
+    except RuntimeError:
+        return monotonic()
+
+
+async def take(iterable, n):
+    if n is not None and (not isinstance(n, int) or n < 0):
+        raise ValueError('n must be None or a non-negative integer')
+    result = []
+    if n == 0:
+        return result
+    async for item in _aiter(iterable):
+        result.append(item)
+        if len(result) == n:
+            break
+    return result
+
+
+def chunked(iterable, n, strict=False):
+    if strict and n is None:
+        raise ValueError('n cant be None when strict is True')
+    return _chunked(_aiter(iterable), n, strict)
+
+
+async def _chunked(iterator, n, strict):
+    while True:
+        chunk = await take(iterator, n)
+        if not chunk:
+            return
+        if strict and len(chunk) != n:
+            raise ValueError('iterator is not divisible by n')
+        yield chunk
+
+
+async def first(iterable, default=_marker):
+    try:
+        return await anext(_aiter(iterable))
+    except StopAsyncIteration as e:
+        if default is _marker:
+            raise ValueError('first() was called on an empty iterable, and no default value was provided. ') from e
+        return default
+
+
+async def last(iterable, default=_marker):
+    if not hasattr(iterable, '__aiter__'):
+        return funcs.last(iterable, default)
+    item = _marker
+    async for item in aiter(iterable):
+        pass
+    if item is _marker:
+        if default is _marker:
+            raise ValueError(
+                'last() was called on an empty iterable and no default was provided.'
+            )
+        return default
+    return item
+
+
+async def nth_or_last(iterable, n, default=_marker):
+    if not hasattr(iterable, '__aiter__'):
+        return funcs.nth_or_last(iterable, n, default)
+    return await last(await take(iterable, n + 1), default=default)
+
+
+async def one(iterable, too_short=None, too_long=None):
+    it = _aiter(iterable)
+    try:
+        first_value = await anext(it)
+    except StopAsyncIteration as e:
+        raise (
+                too_short or ValueError('too few items in iterable (expected 1)')
+        ) from e
+    try:
+        second_value = await anext(it)
+    except StopAsyncIteration:
+        pass
+    else:
+        msg = (
+            'Expected exactly one itme in iterable , but goy {!r},{!r},'
+            'and perhaps more.'.format(first_value, second_value)
+        )
+        raise too_long or ValueError(msg)
+    return first_value
+
+
+async def interleave(*iterables):
+    iterators = [_aiter(iterable) for iterable in iterables]
+    if not iterators:
+        return
+    while True:
+        group = []
+        for iterator in iterators:
+            try:
+                group.append(await anext(iterator))
+            except StopAsyncIteration:
+                return
+        for item in group:
+            yield item
+
+
+async def repeat_each(iterable, n=2):
+    async for item in _aiter(iterable):
+        for _ in range(n):
+            yield item
+
+
+async def strictly_n(iterable, n, too_short=None, too_long=None):
+    it = _aiter(iterable)
+    for i in range(n):
+        try:
+            item = await anext(it)
+        except StopAsyncIteration:
+            if too_short is None:
+                raise ValueError(f'Too few items in iterable (got {i})')
+            too_short(i)
+            return
+        yield item
+    try:
+        await anext(it)
+    except StopAsyncIteration:
+        pass
+    else:
+        if too_long is None:
+            raise ValueError(f'Too few items in iterable (got at least {n + 1}')
+        too_long(n + 1)
+
+
+async def only(iterable, default=None, too_long=None):
+    it = _aiter(iterable)
+    try:
+        first_value = await anext(it)
+    except StopAsyncIteration:
+        return default
+    try:
+        second_value = await anext(it)
+    except StopAsyncIteration:
+        pass
+    else:
+        msg = (
+            'Expected exactly one item in iterable, but got {}, {}'
+            'and perhaps more.'.format(first_value, second_value)
+        )
+        raise too_long or ValueError(msg)
+    return first_value
+
+
+async def split_after(iterable, pred, max_split=-1):
+    if max_split == 0:
+        yield await take(iterable, None)
+        return
+    if not callable(pred):
+        pred = partial(eq, pred)
+    buf = []
+    it = _aiter(iterable)
+    async for item in it:
+        buf.append(item)
+        if await _resolve(pred(item)):
+            yield buf
+            if max_split == 1:
+                yield await take(it, None)
+                return
+            buf = []
+            max_split -= 1
+    if buf:
+        yield buf
+
+
+async def split_into(iterable, sizes):
+    it = _aiter(iterable)
+    for size in sizes:
+        if size is None:
+            yield await take(it, None)
+            return
+        yield await take(it, size)
+
+
+async def map_if(iterable, pred, func, func_else=None):
+    async for item in _aiter(iterable):
+        if await _resolve(pred(item)):
+            yield await _resolve(func(item))
+        elif func_else is None:
+            yield item
+        else:
+            yield await _resolve(func_else(item))
+
+
+class time_limited:
+    def __init__(self, limit_seconds, iterable):
+        if limit_seconds < 0:
+            raise ValueError('limit_seconds must be positive')
+        self.limit_seconds = limit_seconds
+        self._iterable = _aiter(iterable)
+        self._start_time = _loop_time()
+        self.timed_out = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.timed_out:
+            raise StopAsyncIteration
+        remaining = self.limit_seconds - (_loop_time() - self._start_time)
+        if self.limit_seconds == 0 or remaining <= 0:
+            self.timed_out = True
+            raise StopAsyncIteration
+        try:
+            return await asyncio.wait_for(anext(self._iterable), remaining)
+        except asyncio.TimeoutError:
+            self.timed_out = True
+            raise StopAsyncIteration
+
+
+async def difference(iterable, func=sub, *, initial=None):
+    it = _aiter(iterable)
+    try:
+        previous = await anext(it)
+    except StopAsyncIteration:
+        return
+    if initial is None:
+        yield previous
+    async for item in it:
+        yield func(item, previous)
+        previous = item
+
+
+async def value_chain(*args):
+    for value in args:
+        if isinstance(value, (str, bytes)):
+            yield value
+        elif hasattr(value, '__aiter__'):
+            async for item in value:
+                yield item
+        else:
+            try:
+                iterator = iter(value)
+            except TypeError:
+                yield value
+            else:
+                for item in iterator:
+                    yield item
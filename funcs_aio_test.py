@@ -0,0 +1,317 @@
+import asyncio
+import traceback
+from unittest import IsolatedAsyncioTestCase
+import funcs_aio as aio
+from itertools import count, accumulate
+from operator import add
+
+
+async def agen(iterable):
+    for item in iterable:
+        yield item
+
+
+async def alist(aiterable):
+    return [item async for item in aiterable]
+
+
+class TakeTests(IsolatedAsyncioTestCase):
+    async def test_simple_take(self):
+        self.assertEqual(await aio.take(agen(range(10)), 5), [0, 1, 2, 3, 4])
+
+    async def test_null_take(self):
+        self.assertEqual(await aio.take(agen(range(10)), 0), [])
+
+    async def test_negative_take(self):
+        with self.assertRaises(ValueError):
+            await aio.take(-3, agen(range(10)))
+
+    async def test_take_too_much(self):
+        self.assertEqual(await aio.take(agen(range(5)), 10), [0, 1, 2, 3, 4])
+
+    async def test_does_not_overread(self):
+        it = agen(range(5))
+        self.assertEqual(await aio.take(it, 2), [0, 1])
+        self.assertEqual(await aio.take(it, 2), [2, 3])
+
+
+class ChunkedTests(IsolatedAsyncioTestCase):
+    async def test_even(self):
+        actual = await alist(aio.chunked(agen('ABCDEF'), 3))
+        self.assertEqual(actual, [['A', 'B', 'C'], ['D', 'E', 'F']])
+
+    async def test_odd_even(self):
+        actual = await alist(aio.chunked(agen('ABCDE'), 3))
+        self.assertEqual(actual, [['A', 'B', 'C'], ['D', 'E']])
+
+    async def test_none(self):
+        actual = await alist(aio.chunked(agen('ABCDE'), None))
+        self.assertEqual(actual, [['A', 'B', 'C', 'D', 'E']])
+
+    async def test_strict_true(self):
+        with self.assertRaisesRegex(ValueError, 'iterator is not divisible by n'):
+            await alist(aio.chunked(agen('ABCDE'), 3, True))
+        actual = await alist(aio.chunked(agen('ABCDEF'), 3, True))
+        self.assertEqual(actual, [['A', 'B', 'C'], ['D', 'E', 'F']])
+
+    async def test_strict_true_none(self):
+        with self.assertRaisesRegex(ValueError, 'n cant be None when strict is True'):
+            await alist(aio.chunked(agen('ABCDE'), None, True))
+
+
+class FirstTest(IsolatedAsyncioTestCase):
+    async def test_basic(self):
+        self.assertEqual(await aio.first(agen(range(4))), 0)
+
+    async def test_sync_iterable(self):
+        self.assertEqual(await aio.first([3]), 3)
+
+    async def test_default(self):
+        self.assertEqual(await aio.first(agen([]), 'boo'), 'boo')
+
+    async def test_empty_stop_iteration(self):
+        try:
+            await aio.first(agen([]))
+        except ValueError:
+            formatted_exc = traceback.format_exc()
+            self.assertIn('StopAsyncIteration', formatted_exc)
+            self.assertIn('The above exception was the direct cause', formatted_exc)
+        else:
+            self.fail()
+
+
+class LastTest(IsolatedAsyncioTestCase):
+    async def test_basic(self):
+        self.assertEqual(await aio.last(agen(range(4))), 3)
+        self.assertEqual(await aio.last(range(4)), 3)
+        self.assertEqual(await aio.last({n: str(n) for n in range(5)}), 4)
+
+    async def test_default(self):
+        self.assertEqual(await aio.last(agen([]), default=None), None)
+
+    async def test_empty(self):
+        with self.assertRaises(ValueError):
+            await aio.last(agen([]))
+
+
+class NthOrLastTest(IsolatedAsyncioTestCase):
+    async def test_basic(self):
+        self.assertEqual(await aio.nth_or_last(agen(range(3)), 1), 1)
+        self.assertEqual(await aio.nth_or_last(agen(range(3)), 3), 2)
+
+    async def test_default_value(self):
+        self.assertEqual(await aio.nth_or_last(agen(range(0)), 3, 42), 42)
+
+    async def test_empty_iterable_no_default(self):
+        with self.assertRaises(ValueError):
+            await aio.nth_or_last(agen(range(0)), 0)
+
+
+class OneTests(IsolatedAsyncioTestCase):
+    async def test_basic(self):
+        self.assertEqual(await aio.one(agen(['item'])), 'item')
+
+    async def test_too_short(self):
+        for too_short, exc_type in [
+            (None, ValueError),
+            (IndexError, IndexError)
+        ]:
+            with self.subTest(too_short=too_short):
+                with self.assertRaises(exc_type):
+                    await aio.one(agen([]), too_short=too_short)
+
+    async def test_too_long(self):
+        it = agen(count())
+        with self.assertRaises(ValueError):
+            await aio.one(it)
+        self.assertEqual(await anext(it), 2)
+        with self.assertRaises(OverflowError):
+            await aio.one(it, too_long=OverflowError)
+
+
+class InterLeaveTest(IsolatedAsyncioTestCase):
+    async def test_even(self):
+        actual = await alist(aio.interleave(agen([1, 4, 7]), agen([2, 5, 8]), agen([3, 6, 9])))
+        self.assertEqual(actual, [1, 2, 3, 4, 5, 6, 7, 8, 9])
+
+    async def test_shrt(self):
+        actual = await alist(aio.interleave(agen([1, 4]), agen([2, 5, 7]), agen([3, 6, 8])))
+        self.assertEqual(actual, [1, 2, 3, 4, 5, 6])
+
+    async def test_mixed_types(self):
+        actual = await alist(aio.interleave(['a', 'b', 'c', 'd'], agen('123456'), agen(count())))
+        expected = ['a', '1', 0, 'b', '2', 1, 'c', '3', 2, 'd', '4', 3]
+        self.assertEqual(actual, expected)
+
+
+class RepeatEachTests(IsolatedAsyncioTestCase):
+    async def test_default(self):
+        actual = await alist(aio.repeat_each(agen('ABC')))
+        self.assertEqual(actual, ['A', 'A', 'B', 'B', 'C', 'C'])
+
+    async def test_no_repeats(self):
+        self.assertEqual(await alist(aio.repeat_each(agen('ABC'), 0)), [])
+
+
+class StrictlyNTests(IsolatedAsyncioTestCase):
+    async def test_basic(self):
+        actual = await alist(aio.strictly_n(agen('abcd'), 4))
+        self.assertEqual(actual, ['a', 'b', 'c', 'd'])
+
+    async def test_too_short_default(self):
+        with self.assertRaises(ValueError) as exc:
+            await alist(aio.strictly_n(agen('abcd'), 5))
+        self.assertEqual('Too few items in iterable (got 4)', exc.exception.args[0])
+
+    async def test_too_long_default(self):
+        with self.assertRaises(ValueError) as exc:
+            await alist(aio.strictly_n(agen('abcd'), 3))
+        self.assertEqual('Too few items in iterable (got at least 4', exc.exception.args[0])
+
+    async def test_too_short_custom(self):
+        counts = []
+        actual = await alist(aio.strictly_n(agen('abcd'), 6, too_short=counts.append))
+        self.assertEqual(actual, ['a', 'b', 'c', 'd'])
+        self.assertEqual(counts, [4])
+
+
+class OnlyTests(IsolatedAsyncioTestCase):
+    async def test_defaults(self):
+        self.assertEqual(await aio.only(agen([])), None)
+        self.assertEqual(await aio.only(agen([1])), 1)
+        with self.assertRaises(ValueError):
+            await aio.only(agen([1, 2]))
+
+    async def test_custom_exception(self):
+        with self.assertRaises(RuntimeError):
+            await aio.only(agen([1, 2]), too_long=RuntimeError)
+
+
+class SplitAfterTest(IsolatedAsyncioTestCase):
+    async def test_start_with_sep(self):
+        actual = await alist(aio.split_after(agen('xooxoo'), lambda c: c == 'x'))
+        self.assertEqual(actual, [['x'], ['o', 'o', 'x'], ['o', 'o']])
+
+    async def test_max_split(self):
+        for max_split, expected in [
+            (-1, [['a', ','], ['b', ','], ['c', ','], ['d']]),
+            (0, [['a', ',', 'b', ',', 'c', ',', 'd']]),
+            (1, [['a', ','], ['b', ',', 'c', ',', 'd']]),
+            (2, [['a', ','], ['b', ','], ['c', ',', 'd']]),
+        ]:
+            with self.subTest(max_split=max_split):
+                actual = await alist(aio.split_after(agen('a,b,c,d'), ',', max_split))
+                self.assertEqual(actual, expected)
+
+    async def test_async_pred(self):
+        async def pred(c):
+            return c == 'x'
+
+        actual = await alist(aio.split_after(agen('oxo'), pred))
+        self.assertEqual(actual, [['o', 'x'], ['o']])
+
+
+class SplitIntoTests(IsolatedAsyncioTestCase):
+    async def test_using_none_with_leftover(self):
+        actual = await alist(aio.split_into(agen(range(1, 10)), [2, 3, None]))
+        self.assertEqual(actual, [[1, 2], [3, 4, 5], [6, 7, 8, 9]])
+
+    async def test_iterable_too_small_extra(self):
+        actual = await alist(aio.split_into(agen(range(1, 8)), [2, 3, 4, 5]))
+        self.assertEqual(actual, [[1, 2], [3, 4, 5], [6, 7], []])
+
+    async def test_invalid_in_sizes(self):
+        with self.assertRaises(ValueError):
+            await alist(aio.split_into(agen(range(9)), [1, [], 3]))
+
+    async def test_iterable_integrity(self):
+        it = agen(range(10))
+        actual = await alist(aio.split_into(it, [2, 3]))
+        self.assertEqual(actual, [[0, 1], [2, 3, 4]])
+        self.assertEqual(await alist(it), [5, 6, 7, 8, 9])
+
+
+class MapIfTests(IsolatedAsyncioTestCase):
+    async def test_without_func_else(self):
+        actual = await alist(aio.map_if(agen(range(-5, 5)), lambda x: x > 3, lambda x: 'toobig'))
+        self.assertEqual(actual, [-5, -4, -3, -2, -1, 0, 1, 2, 3, 'toobig'])
+
+    async def test_with_func_else(self):
+        actual = await alist(aio.map_if(agen(range(-5, 5)), lambda x: x >= 0, lambda x: 'notneg', lambda x: 'neg'))
+        self.assertEqual(actual, ['neg'] * 5 + ['notneg'] * 5)
+
+    async def test_async_func(self):
+        async def double(x):
+            return x * 2
+
+        actual = await alist(aio.map_if(agen(range(4)), lambda x: x % 2, double))
+        self.assertEqual(actual, [0, 2, 2, 6])
+
+
+class TimeLimitedTests(IsolatedAsyncioTestCase):
+    async def test_basic(self):
+        async def generator():
+            yield 1
+            yield 2
+            await asyncio.sleep(0.2)
+            yield 3
+
+        iterable = aio.time_limited(0.1, generator())
+        actual = await alist(iterable)
+        self.assertEqual(actual, [1, 2])
+        self.assertTrue(iterable.timed_out)
+
+    async def test_preempts_slow_producer(self):
+        async def generator():
+            yield 1
+            await asyncio.sleep(10)
+            yield 2
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        iterable = aio.time_limited(0.05, generator())
+        self.assertEqual(await alist(iterable), [1])
+        self.assertLess(loop.time() - start, 1)
+        self.assertTrue(iterable.timed_out)
+
+    async def test_complete(self):
+        iterable = aio.time_limited(2, agen(range(10)))
+        self.assertEqual(await alist(iterable), list(range(10)))
+        self.assertFalse(iterable.timed_out)
+
+    async def test_zero_limit(self):
+        iterable = aio.time_limited(0, agen(count()))
+        self.assertEqual(await alist(iterable), [])
+        self.assertTrue(iterable.timed_out)
+
+    async def test_invalid_limit(self):
+        with self.assertRaises(ValueError):
+            aio.time_limited(-0.1, agen(count()))
+
+
+class DifferenceTests(IsolatedAsyncioTestCase):
+    async def test_normal(self):
+        actual = await alist(aio.difference(agen([10, 20, 30, 40, 50])))
+        self.assertEqual(actual, [10, 10, 10, 10, 10])
+
+    async def test_custom(self):
+        actual = await alist(aio.difference(agen([10, 20, 30, 40, 50]), add))
+        self.assertEqual(actual, [10, 30, 50, 70, 90])
+
+    async def test_emtpy(self):
+        self.assertEqual(await alist(aio.difference(agen([]))), [])
+
+    async def test_initial(self):
+        original = list(range(100))
+        accumulated = agen(accumulate(original, initial=100))
+        actual = await alist(aio.difference(accumulated, initial=100))
+        self.assertEqual(actual, original)
+
+
+class ValueChainTest(IsolatedAsyncioTestCase):
+    async def test_more(self):
+        actual = await alist(aio.value_chain(b'bar', [1, 2, 3], 4, {'key': 1}, agen('xy')))
+        self.assertEqual(actual, [b'bar', 1, 2, 3, 4, 'key', 'x', 'y'])
+
+    async def test_empty(self):
+        self.assertEqual(await alist(aio.value_chain()), [])
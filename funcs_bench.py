@@ -0,0 +1,707 @@
+import heapq
+import json
+import statistics
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from itertools import accumulate, chain, groupby, islice, product, repeat, tee, zip_longest
+from operator import neg
+from os import path
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from timeit import timeit
+
+import funcs
+
+KINDS = ('list', 'generator', 'range', 'bytes', 'file')
+SIZES = (10, 1000, 100_000)
+WORKLOADS = {}
+_files = {}
+_executor = None
+_fill = object()
+
+
+def make_input(kind, size):
+    if kind == 'list':
+        return list(range(size))
+    if kind == 'generator':
+        return (i for i in range(size))
+    if kind == 'range':
+        return range(size)
+    if kind == 'bytes':
+        return (bytes(range(256)) * (size // 256 + 1))[:size]
+    if kind == 'file':
+        if size not in _files:
+            if not _files:
+                _files[None] = TemporaryDirectory()
+            file_path = path.join(_files[None].name, f'{size}.bin')
+            with open(file_path, 'wb') as f:
+                f.write(((b'x' * 63 + b'\n') * (size // 64 + 1))[:size])
+            _files[size] = file_path
+        return _files[size]
+    raise ValueError(f'unknown input kind {kind!r}')
+
+
+def consume(iterable):
+    deque(iterable, maxlen=0)
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(2)
+    return _executor
+
+
+def workload(kinds=KINDS[:4], **grid):
+    def register(run):
+        WORKLOADS[run.__name__] = (kinds, grid, run)
+        return run
+
+    return register
+
+
+@workload()
+def take(data, size):
+    funcs.take(data, size)
+
+
+@workload()
+def take_into(data, size):
+    funcs.take_into(data, size, [None] * size)
+
+
+@workload()
+def take_array(data, size):
+    funcs.take_array(data, size, 'q')
+
+
+@workload(n=(16, 4096))
+def chunked(data, size, n):
+    consume(funcs.chunked(data, n))
+
+
+@workload(n=(16, 4096))
+def chunked_adaptive(data, size, n):
+    consume(funcs.chunked_adaptive(data, n))
+
+
+@workload(n=(4096,))
+def map_chunked(data, size, n):
+    consume(funcs.map_chunked(data, n, len, executor=executor()))
+
+
+@workload()
+def first(data, size):
+    funcs.first(data, None)
+
+
+@workload()
+def last(data, size):
+    funcs.last(data, None)
+
+
+@workload()
+def nth_or_last(data, size):
+    funcs.nth_or_last(data, size // 2, None)
+
+
+@workload()
+def one(data, size):
+    funcs.one(funcs.take(data, 1), too_short=LookupError)
+
+
+@workload()
+def only(data, size):
+    funcs.only(funcs.take(data, 1))
+
+
+@workload()
+def interleave(data, size):
+    consume(funcs.interleave(data, repeat(0)))
+
+
+@workload()
+def interleave_longest(data, size):
+    consume(funcs.interleave_longest(data, range(size // 2)))
+
+
+@workload()
+def roundrobin(data, size):
+    consume(funcs.roundrobin(data, range(size // 2), weights=(2, 1)))
+
+
+@workload()
+def merge_sorted(data, size):
+    consume(funcs.merge_sorted(data, range(size // 2)))
+
+
+@workload(n=(16,))
+def windowed(data, size, n):
+    consume(funcs.windowed(data, n))
+
+
+@workload(n=(2,))
+def repeat_each(data, size, n):
+    consume(funcs.repeat_each(data, n))
+
+
+@workload()
+def run_length_encode(data, size):
+    funcs.run_length_encode(data)
+
+
+@workload()
+def strictly_n(data, size):
+    consume(funcs.strictly_n(data, size))
+
+
+@workload()
+def always_reversible(data, size):
+    consume(funcs.always_reversible(data))
+
+
+@workload()
+def always_iterable(data, size):
+    consume(funcs.always_iterable(data))
+
+
+@workload(every=(16, 4096))
+def split_after(data, size, every):
+    consume(funcs.split_after(data, lambda item: item % every == 0))
+
+
+@workload(n=(16, 4096))
+def split_into(data, size, n):
+    consume(funcs.split_into(data, repeat(n, size // n + 1)))
+
+
+@workload()
+def map_if(data, size):
+    consume(funcs.map_if(data, bool, neg))
+
+
+@workload()
+def time_limited(data, size):
+    consume(funcs.time_limited(3600, data))
+
+
+@workload()
+def replayable(data, size):
+    leader = funcs.replayable(data)
+    consume(zip(leader, leader.cursor()))
+
+
+@workload(vectorize=(False, True))
+def difference(data, size, vectorize):
+    consume(funcs.difference(data, vectorize=vectorize))
+
+
+@workload(kinds=('bytes',))
+def parallel_difference(data, size):
+    funcs.parallel_difference(data, executor=executor())
+
+
+@workload(kinds=('bytes',))
+def parallel_accumulate(data, size):
+    funcs.parallel_accumulate(data, executor=executor())
+
+
+@workload()
+def running_stats(data, size):
+    funcs.RunningStats(data).snapshot()
+
+
+@workload()
+def value_chain(data, size):
+    consume(funcs.value_chain(*data))
+
+
+@workload()
+def pipeline(data, size):
+    consume(funcs.Pipeline(data).map(neg).filter(bool).map_if(bool, neg).chunked(16))
+
+
+@workload(kinds=('list', 'range', 'bytes'))
+def sequence_view(data, size):
+    consume(funcs.SequenceView(data))
+
+
+@workload(kinds=('file',))
+def mmap_records(data, size):
+    consume(funcs.mmap_records(data))
+
+
+@workload(kinds=('file',), n=(4096,))
+def mmap_chunks(data, size, n):
+    consume(funcs.mmap_chunks(data, n))
+
+
+def cases(names=None, kinds=KINDS, sizes=SIZES):
+    for name, (workload_kinds, grid, run) in WORKLOADS.items():
+        if names and name not in names:
+            continue
+        for kind, size, values in product(workload_kinds, sizes, product(*grid.values())):
+            if kind not in kinds:
+                continue
+            params = dict(zip(grid, values))
+            label = ','.join([kind, f'size={size}'] + [f'{k}={v}' for k, v in params.items()])
+            yield f'{name}[{label}]', kind, size, partial(run, size=size, **params)
+
+
+def measure(kind, size, run, repeat=5, min_items=100_000):
+    number = max(1, min_items // max(size, 1))
+    best = float('inf')
+    for _ in range(repeat):
+        inputs = [make_input(kind, size) for _ in range(number)]
+        start = perf_counter()
+        for data in inputs:
+            run(data)
+        best = min(best, (perf_counter() - start) / number)
+    data = make_input(kind, size)
+    tracemalloc.start()
+    try:
+        run(data)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'throughput': size / best if best else float('inf'), 'peak_bytes': peak}
+
+
+def compare(baseline, results, max_slowdown=0.25, max_memory_growth=0.25, memory_slack=16384):
+    failures = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if current['throughput'] < previous['throughput'] * (1 - max_slowdown):
+            failures.append(
+                f"{key}: throughput {current['throughput']:.4g}/s < baseline {previous['throughput']:.4g}/s"
+            )
+        if current['peak_bytes'] > previous['peak_bytes'] * (1 + max_memory_growth) + memory_slack:
+            failures.append(
+                f"{key}: peak memory {current['peak_bytes']} B > baseline {previous['peak_bytes']} B"
+            )
+    return failures
+
+
+def _old_chunked(iterable, n):
+    return iter(partial(funcs.take, iter(iterable), n), [])
+
+
+def bench_chunked(number=5):
+    workloads = [
+        ('list', list(range(1_000_000)), 1000),
+        ('bytes', bytes(100_000_000), 65536),
+    ]
+    for name, data, n in workloads:
+        old = timeit(lambda: list(_old_chunked(data, n)), number=number)
+        new = timeit(lambda: list(funcs.chunked(data, n)), number=number)
+        print(f'chunked {name:<6} old {old / number:.6f}s  new {new / number:.6f}s  x{old / new:.1f}')
+
+
+def bench_difference(number=3):
+    workloads = [
+        ('list', list(range(1_000_000))),
+        ('array', array('q', range(1_000_000))),
+    ]
+    for name, data in workloads:
+        old = timeit(lambda: deque(funcs.difference(data), maxlen=0), number=number)
+        new = timeit(lambda: deque(funcs.difference(data, vectorize=True), maxlen=0), number=number)
+        print(f'difference {name:<6} old {old / number:.6f}s  new {new / number:.6f}s  x{old / new:.1f}')
+
+
+def bench_split_after(number=3):
+    data = b'x' * 99 + b'\n'
+    data *= 100_000
+    old = timeit(lambda: deque(funcs._split_after(data, lambda c: c == 10, -1), maxlen=0), number=number)
+    new = timeit(lambda: deque(funcs.split_after(data, b'\n'), maxlen=0), number=number)
+    print(f'split_after bytes  old {old / number:.6f}s  new {new / number:.6f}s  x{old / new:.1f}')
+
+
+def bench_nth_or_last(number=5):
+    n = 1_000_000
+    workloads = [
+        ('list', list(range(n))),
+        ('range', range(n)),
+        ('dict', dict.fromkeys(range(n))),
+    ]
+    for name, data in workloads:
+        old = timeit(lambda: funcs.last(islice(data, n)), number=number)
+        new = timeit(lambda: funcs.nth_or_last(data, n - 1), number=number)
+        print(f'nth_or_last {name:<6} old {old / number:.6f}s  new {new / number:.6f}s  x{old / new:.1f}')
+
+
+def bench_mmap_records(number=3, total=128 * 1024 * 1024):
+    for record_size in (64, 65536):
+        with TemporaryDirectory() as directory:
+            file_path = path.join(directory, 'records.bin')
+            with open(file_path, 'wb') as f:
+                f.write((b'x' * (record_size - 1) + b'\n') * (total // record_size))
+
+            def readlines():
+                with open(file_path, 'rb') as f:
+                    deque(f, maxlen=0)
+
+            old = timeit(readlines, number=number)
+            new = timeit(lambda: deque(funcs.mmap_records(file_path), maxlen=0), number=number)
+            print(f'mmap_records {record_size:>6}B old {old / number:.6f}s  new {new / number:.6f}s  x{old / new:.1f}')
+
+
+class _OldSequenceView(funcs.Sequence):
+    def __init__(self, target):
+        self._target = target
+
+    def __getitem__(self, index):
+        return self._target[index]
+
+    def __len__(self):
+        return len(self._target)
+
+
+def bench_sequence_view(number=5):
+    n = 1_000_000
+    for name, data in (('list', list(range(n))), ('bytes', bytes(n - 1) + b'\x01')):
+        old, new = _OldSequenceView(data), funcs.SequenceView(data)
+        value = data[-1]
+        for op, run in (
+                ('slice', lambda view: view[1:-1]),
+                ('index', lambda view: view.index(value)),
+                ('count', lambda view: view.count(value)),
+                ('contains', lambda view: value in view),
+        ):
+            old_time = timeit(lambda: run(old), number=number)
+            new_time = timeit(lambda: run(new), number=number)
+            print(f'sequence_view {name:<5} {op:<8} old {old_time / number:.6f}s  '
+                  f'new {new_time / number:.6f}s  x{old_time / new_time:.1f}')
+
+
+def _view_len(view):
+    return len(view)
+
+
+def bench_shared_view(number=3, n=10_000_000):
+    data = array('d', range(n))
+    with funcs.SharedSequenceView(data) as shared:
+        for workers in (2, 4, 8):
+            with ProcessPoolExecutor(workers) as pool:
+                list(pool.map(_view_len, [b''] * workers))
+                old = timeit(lambda: list(pool.map(_view_len, [funcs.SequenceView(data)] * workers)), number=number)
+                new = timeit(lambda: list(pool.map(_view_len, [shared] * workers)), number=number)
+            print(f'shared_view {workers} workers old {old / number:.6f}s  new {new / number:.6f}s  x{old / new:.1f}')
+
+
+def _old_interleave_longest(*iterables):
+    return filter(lambda x: x is not _fill, chain.from_iterable(zip_longest(*iterables, fillvalue=_fill)))
+
+
+def bench_interleave_longest(number=3, total=200_000):
+    for inputs in (2, 100, 1000):
+        staggered = [total // inputs * (i + 1) * 2 // (inputs + 1) for i in range(inputs)]
+        skewed = [10] * (inputs - 1) + [total - 10 * (inputs - 1)]
+        for shape, lengths in (('staggered', staggered), ('skewed', skewed)):
+            old = timeit(lambda: consume(_old_interleave_longest(*map(range, lengths))), number=number)
+            new = timeit(lambda: consume(funcs.interleave_longest(*map(range, lengths))), number=number)
+            print(f'interleave_longest {inputs:>4} {shape:<9} old {old / number:.6f}s  '
+                  f'new {new / number:.6f}s  x{old / new:.1f}')
+
+
+def bench_merge_sorted(number=3, total=1_000_000):
+    rng = Random(0)
+    for inputs in (2, 100, 5000):
+        shards = [sorted(rng.random() for _ in range(total // inputs)) for _ in range(inputs)]
+        old = timeit(lambda: consume(heapq.merge(*shards)), number=number)
+        new = timeit(lambda: consume(funcs.merge_sorted(*shards)), number=number)
+        print(f'merge_sorted {inputs:>4} inputs old {old / number:.6f}s  new {new / number:.6f}s  x{old / new:.1f}')
+
+
+def _old_run_length_encode(iterable):
+    values, counts = [], []
+    for value, group in groupby(iterable):
+        values.append(value)
+        counts.append(sum(1 for _ in group))
+    return values, counts
+
+
+def _old_repeat_each_counts(iterable, counts):
+    for item, n in zip(iterable, counts):
+        yield from repeat(item, n)
+
+
+def bench_run_length(number=3, n=10_000_000):
+    data = [i // 7 % 13 for i in range(n)]
+    inputs = [('list', data), ('array', array('q', data))]
+    if funcs.np is not None:
+        inputs.append(('numpy', funcs.np.array(data)))
+
+    def old():
+        values, counts = _old_run_length_encode(data)
+        consume(_old_repeat_each_counts(values, counts))
+
+    old_time = timeit(old, number=number)
+    for name, series in inputs:
+        def new():
+            values, counts = funcs.run_length_encode(series)
+            expanded = funcs.repeat_each(values, counts)
+            if name == 'list':
+                consume(expanded)
+
+        new_time = timeit(new, number=number)
+        print(f'run_length {name:<5} round trip old {old_time / number:.6f}s  '
+              f'new {new_time / number:.6f}s  x{old_time / new_time:.1f}')
+
+
+def bench_windowed(number=3, n=1_000_000, width=100):
+    data = [i * 7919 % 1000 for i in range(n)]
+    for aggregate, func in (('sum', sum), ('min', min), ('max', max)):
+        old = timeit(lambda: consume(map(func, funcs.windowed(data, width))), number=number)
+        new = timeit(lambda: consume(funcs.windowed(data, width, aggregate=aggregate)), number=number)
+        line = f'windowed {aggregate} old {old / number:.6f}s  new {new / number:.6f}s  x{old / new:.1f}'
+        if funcs.np is not None:
+            vector = funcs.np.array(data)
+            fast = timeit(lambda: funcs.windowed(vector, width, aggregate=aggregate), number=number)
+            line += f'  numpy {fast / number:.6f}s  x{old / fast:.1f}'
+        print(line)
+
+
+def bench_pipeline(number=3, n=200_000):
+    data = [[i, i + 1] if i % 4 else i for i in range(n)]
+    items = sum(len(x) if isinstance(x, list) else 1 for x in data)
+    inc = (1).__add__
+    for depth in (1, 2, 4, 8, 16):
+        def nested():
+            it = funcs.value_chain(*data)
+            for _ in range(depth):
+                it = funcs.map_if(it, bool, inc)
+            consume(it)
+
+        def fused():
+            pipeline = funcs.Pipeline(data).value_chain()
+            for _ in range(depth):
+                pipeline = pipeline.map_if(bool, inc)
+            consume(pipeline)
+
+        old = timeit(nested, number=number) / number / items * 1e9
+        new = timeit(fused, number=number) / number / items * 1e9
+        print(f'pipeline depth {depth:>2} nested {old:.0f}ns/item  pipeline {new:.0f}ns/item  x{old / new:.2f}')
+
+
+def bench_running_stats(number=3, n=1_000_000):
+    rng = Random(0)
+    counters = list(accumulate(rng.randrange(100) for _ in range(n)))
+
+    def old():
+        deltas = list(funcs.difference(counters, initial=0))
+        statistics.mean(deltas), statistics.variance(deltas), min(deltas), max(deltas)
+        statistics.quantiles(deltas, n=100)
+
+    def new():
+        funcs.RunningStats(funcs.difference(counters, initial=0)).snapshot()
+
+    old_time = timeit(old, number=number)
+    new_time = timeit(new, number=number)
+    print(f'running_stats old {old_time / number:.6f}s  new {new_time / number:.6f}s  x{old_time / new_time:.1f}')
+
+
+def bench_parallel_scan(number=3, n=5_000_000):
+    data = array('q', range(0, 3 * n, 3))
+
+    def old():
+        array('q', accumulate(funcs.difference(data)))
+
+    with ProcessPoolExecutor() as executor:
+        def new():
+            funcs.parallel_accumulate(funcs.parallel_difference(data, executor=executor), executor=executor)
+
+        new()
+        old_time = timeit(old, number=number)
+        new_time = timeit(new, number=number)
+    print(f'parallel_scan old {old_time / number:.6f}s  new {new_time / number:.6f}s  x{old_time / new_time:.1f}')
+
+
+def bench_value_chain(number=3, n=1_000_000):
+    workloads = {
+        'scalars': list(range(n)),
+        'lists 1/16': [[i, i] if i % 16 == 0 else i for i in range(n)],
+        'alternating': [[i, i] if i % 2 else i for i in range(n)],
+        'mixed types': [[i] if i % 3 == 0 else str(i) if i % 3 == 1 else float(i) for i in range(n)],
+    }
+    for name, data in workloads.items():
+        old = timeit(lambda: consume(_old_value_chain(*data)), number=number) / number
+        new = timeit(lambda: consume(funcs.value_chain(*data)), number=number) / number
+        print(f'value_chain {name:<12} old {old:.6f}s  new {new:.6f}s  x{old / new:.2f}')
+
+
+def bench_replayable(number=3, n=1_000_000, max_items=10_000):
+    def lagging(leader, follower):
+        for _ in islice(leader, n // 2):
+            pass
+        for _ in zip(leader, follower):
+            pass
+
+    def old():
+        lagging(*tee(range(n)))
+
+    def new():
+        leader = funcs.replayable(range(n), max_items=max_items)
+        lagging(leader, leader.cursor())
+        leader.close()
+
+    for name, run in (('tee', old), ('replayable', new)):
+        seconds = timeit(run, number=number) / number
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        print(f'{name:<12} lagging cursor {seconds:.6f}s  peak {peak / 2 ** 20:.1f}MiB')
+
+
+def _old_strict_chunked(iterable, n):
+    iterator = _old_chunked(iterable, n)
+
+    def ret():
+        for chunk in iterator:
+            if len(chunk) != n:
+                raise ValueError('iterator is not divisible by n')
+            yield chunk
+
+    return iter(ret())
+
+
+def _old_strictly_n(iterable, n, too_short=None, too_long=None):
+    if too_short is None:
+        too_short = lambda item_count: funcs.raise_(ValueError, f'Too few items in iterable (got {item_count})')
+    if too_long is None:
+        too_long = lambda item_count: funcs.raise_(ValueError, f'Too few items in iterable (got at least {item_count}')
+    it = iter(iterable)
+    for i in range(n):
+        try:
+            item = next(it)
+        except StopIteration:
+            too_short(i)
+            return
+        else:
+            yield item
+    try:
+        next(it)
+    except StopIteration:
+        pass
+    else:
+        too_long(n + 1)
+
+
+def _old_split_after(iterable, pred, max_split=-1):
+    buf = []
+    it = iter(iterable)
+    for item in it:
+        buf.append(item)
+        if pred(item) and buf:
+            yield buf
+            if max_split == 1:
+                yield list(it)
+                return
+            buf = []
+            max_split -= 1
+    if buf:
+        yield buf
+
+
+def _old_map_if(iterable, pred, func, func_else=lambda x: x):
+    for item in iterable:
+        yield func(item) if pred(item) else func_else(item)
+
+
+def _old_value_chain(*args):
+    for value in args:
+        if isinstance(value, (str, bytes)):
+            yield value
+            continue
+        try:
+            yield from value
+        except TypeError:
+            yield value
+
+
+def bench_small_iterators(number=200_000):
+    data = (1, 2, 3, 4)
+    workloads = [
+        ('chunked strict', lambda: _old_strict_chunked(data, 2), lambda: funcs.chunked(data, 2, True)),
+        ('strictly_n', lambda: _old_strictly_n(data, 4), lambda: funcs.strictly_n(data, 4)),
+        ('split_after', lambda: _old_split_after(data, bool), lambda: funcs.split_after(data, bool)),
+        ('map_if', lambda: _old_map_if(data, bool, neg), lambda: funcs.map_if(data, bool, neg)),
+        ('value_chain', lambda: _old_value_chain(1, data, 2), lambda: funcs.value_chain(1, data, 2)),
+    ]
+    for name, old_factory, new_factory in workloads:
+        old = timeit(lambda: consume(old_factory()), number=number)
+        new = timeit(lambda: consume(new_factory()), number=number)
+        print(f'{name:<15} old {old / number * 1e9:.0f}ns  new {new / number * 1e9:.0f}ns  x{old / new:.2f}')
+
+
+def compare_paths():
+    bench_chunked()
+    bench_difference()
+    bench_split_after()
+    bench_nth_or_last()
+    bench_mmap_records()
+    bench_small_iterators()
+    bench_interleave_longest()
+    bench_merge_sorted()
+    bench_run_length()
+    bench_windowed()
+    bench_pipeline()
+    bench_running_stats()
+    bench_replayable()
+    bench_parallel_scan()
+    bench_value_chain()
+    bench_sequence_view()
+    bench_shared_view()
+
+
+def main(argv=None):
+    parser = ArgumentParser(description='Benchmark the funcs helpers.')
+    parser.add_argument('--only', help='comma-separated workload names')
+    parser.add_argument('--kinds', default=','.join(KINDS), help='comma-separated input kinds')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help='comma-separated input sizes')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH', help='write results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='fail on regressions against a JSON baseline')
+    parser.add_argument('--max-slowdown', type=float, default=0.25)
+    parser.add_argument('--max-memory-growth', type=float, default=0.25)
+    parser.add_argument('--paths', action='store_true', help='compare old and new code paths instead')
+    args = parser.parse_args(argv)
+
+    if args.paths:
+        compare_paths()
+        return 0
+
+    names = set(args.only.split(',')) if args.only else None
+    kinds = args.kinds.split(',')
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = {}
+    for key, kind, size, run in cases(names, kinds, sizes):
+        results[key] = measure(kind, size, run, args.repeat)
+        result = results[key]
+        print(f"{key:<60} {result['throughput']:>14.4g} items/s {result['peak_bytes']:>12} B peak")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': sys.version, 'results': results}, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        failures = compare(baseline, results, args.max_slowdown, args.max_memory_growth)
+        for failure in failures:
+            print(f'REGRESSION {failure}')
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,41 @@
 import traceback
+import sys
+import threading
+import pickle
+import statistics
+from importlib.util import find_spec, module_from_spec
 from unittest import TestCase, skipIf
+from unittest.mock import patch
 import funcs
-from itertools import count, cycle, accumulate
-from time import sleep
-from operator import add
+from itertools import count, cycle, accumulate, chain, islice, zip_longest
+from time import sleep, monotonic
+from operator import add, floordiv, itemgetter, sub
+from heapq import merge
 from sys import version_info
+from array import array
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from tempfile import TemporaryDirectory
+from os import path
+
+
+def _is_odd(x):
+    return x % 2
+
+
+def _square(x):
+    return x * x
+
+
+def _double_minus(a, b):
+    return 2 * a - b
+
+
+def _shared_sum(view):
+    try:
+        return view.name, sum(view)
+    finally:
+        view.close()
 
 
 class TakeTests(TestCase):
@@ -24,6 +55,44 @@ class TakeTests(TestCase):
         self.assertEqual(t, [0, 1, 2, 3, 4])
 
 
+class TakeIntoTests(TestCase):
+    def test_list(self):
+        out = [None] * 5
+        self.assertEqual(funcs.take_into(range(10), 3, out), 3)
+        self.assertEqual(out, [0, 1, 2, None, None])
+
+    def test_short_input(self):
+        out = array('d', [0.0] * 4)
+        self.assertEqual(funcs.take_into(iter([1.5, 2.5]), 4, out), 2)
+        self.assertEqual(out.tolist(), [1.5, 2.5, 0.0, 0.0])
+        self.assertEqual(funcs.take_into([], 4, out), 0)
+
+    def test_memoryview(self):
+        buffer = bytearray(4)
+        self.assertEqual(funcs.take_into(b'abcdef', 4, memoryview(buffer)), 4)
+        self.assertEqual(buffer, b'abcd')
+
+    def test_does_not_overread(self):
+        it = iter(range(10))
+        funcs.take_into(it, 2, [None] * 2)
+        self.assertEqual(next(it), 2)
+
+    def test_too_small(self):
+        self.assertRaises(ValueError, lambda: funcs.take_into(range(10), 3, [None]))
+
+
+class TakeArrayTests(TestCase):
+    def test_basic(self):
+        actual = funcs.take_array(count(), 4, 'q')
+        self.assertEqual(actual, array('q', [0, 1, 2, 3]))
+
+    def test_take_too_much(self):
+        self.assertEqual(funcs.take_array(iter([0.5]), 3, 'd'), array('d', [0.5]))
+
+    def test_bad_value(self):
+        self.assertRaises(TypeError, lambda: funcs.take_array(['x'], 1, 'i'))
+
+
 class ChunkedTests(TestCase):
     def test_even(self):
         self.assertEqual(
@@ -63,6 +132,37 @@ class ChunkedTests(TestCase):
             ValueError, 'n cant be None when strict is True', f
         )
 
+    def test_list_slices(self):
+        self.assertEqual(
+            list(funcs.chunked(list(range(7)), 3)), [[0, 1, 2], [3, 4, 5], [6]]
+        )
+        self.assertEqual(list(funcs.chunked([1, 2], None)), [[1, 2]])
+        self.assertEqual(list(funcs.chunked([], 3)), [])
+        self.assertEqual(list(funcs.chunked([], None)), [])
+
+    def test_buffer_views(self):
+        data = bytearray(b'ABCDE')
+        chunks = list(funcs.chunked(data, 2))
+        self.assertTrue(all(isinstance(chunk, memoryview) for chunk in chunks))
+        self.assertEqual([bytes(chunk) for chunk in chunks], [b'AB', b'CD', b'E'])
+        data[0] = ord('Z')
+        self.assertEqual(bytes(chunks[0]), b'ZB')
+
+    def test_array_views(self):
+        data = array('i', range(5))
+        actual = [chunk.tolist() for chunk in funcs.chunked(data, 2)]
+        self.assertEqual(actual, [[0, 1], [2, 3], [4]])
+
+    def test_buffer_strict(self):
+        self.assertRaisesRegex(
+            ValueError, 'iterator is not divisible by n',
+            lambda: list(funcs.chunked(b'ABCDE', 2, True))
+        )
+        self.assertEqual(
+            [bytes(chunk) for chunk in funcs.chunked(b'ABCD', 2, True)],
+            [b'AB', b'CD']
+        )
+
 
 class FirstTest(TestCase):
     def test_empty(self):
@@ -128,6 +228,54 @@ class NthOrLastTest(TestCase):
     def test_empty_iterable_no_default(self):
         self.assertRaises(ValueError, lambda: funcs.nth_or_last(range(0), 0))
 
+    def test_kinds(self):
+        for iterable in (
+                list(range(5)), tuple(range(5)), range(5), iter(range(5)),
+                dict.fromkeys(range(5)), dict.fromkeys(range(5)).keys(), set(range(5)),
+        ):
+            with self.subTest(iterable=iterable):
+                self.assertEqual(funcs.nth_or_last(iterable, 2), 2)
+        for iterable in (list(range(5)), range(5), dict.fromkeys(range(5)), iter(range(5))):
+            with self.subTest(iterable=iterable):
+                self.assertEqual(funcs.nth_or_last(iterable, 10), 4)
+
+    def test_empty_kinds(self):
+        for iterable in ([], {}, iter([]), set()):
+            with self.subTest(iterable=iterable):
+                self.assertEqual(funcs.nth_or_last(iterable, 3, 'x'), 'x')
+                self.assertRaises(ValueError, lambda: funcs.nth_or_last(iterable, 3))
+
+    def test_negative_n(self):
+        self.assertEqual(funcs.nth_or_last([1, 2], -1, 'x'), 'x')
+        self.assertRaises(ValueError, lambda: funcs.nth_or_last([1, 2], -2))
+
+    def test_does_not_iterate_sequences(self):
+        class Indexed(list):
+            def __iter__(self):
+                raise AssertionError('iterated')
+
+        self.assertEqual(funcs.nth_or_last(Indexed(range(10)), 3), 3)
+
+    def test_register(self):
+        class Ring:
+            def __init__(self, items):
+                self.items = items
+
+            def __iter__(self):
+                raise AssertionError('iterated')
+
+        @funcs.nth_lookup.register(Ring)
+        def _(ring, n):
+            return ring.items[min(n, len(ring.items) - 1)]
+
+        self.assertEqual(funcs.nth_or_last(Ring('abc'), 1), 'b')
+        self.assertEqual(funcs.nth_or_last(Ring('abc'), 7), 'c')
+        self.assertEqual(funcs.nth_or_last(Ring(''), 7, None), None)
+
+    @skipIf(funcs.np is None, 'ndarray input needs numpy')
+    def test_ndarray(self):
+        self.assertEqual(funcs.nth_or_last(funcs.np.arange(5), 9), 4)
+
 
 class OneTests(TestCase):
     def test_basic(self):
@@ -188,6 +336,83 @@ class InterLeaveTest(TestCase):
         self.assertEqual(actual, expected)
 
 
+class InterleaveLongestTests(TestCase):
+    def test_uneven(self):
+        actual = list(funcs.interleave_longest([1, 4], [2, 5, 7, 9], [3, 6, 8]))
+        self.assertEqual(actual, [1, 2, 3, 4, 5, 6, 7, 8, 9])
+
+    def test_empty(self):
+        self.assertEqual(list(funcs.interleave_longest()), [])
+        self.assertEqual(list(funcs.interleave_longest([], 'ab', [])), ['a', 'b'])
+
+    def test_many_inputs(self):
+        inputs = [range(i % 7) for i in range(3000)]
+        expected = [x for x in chain.from_iterable(zip_longest(*inputs, fillvalue=None)) if x is not None]
+        self.assertEqual(list(funcs.interleave_longest(*inputs)), expected)
+
+    def test_error_propagates(self):
+        def broken():
+            yield 1
+            raise ZeroDivisionError
+
+        it = funcs.interleave_longest([0, 2], broken())
+        self.assertEqual([next(it), next(it), next(it)], [0, 1, 2])
+        self.assertRaises(ZeroDivisionError, next, it)
+
+
+class RoundRobinTests(TestCase):
+    def test_unweighted(self):
+        self.assertEqual(list(funcs.roundrobin('ABC', 'D', 'EF')), list('ADEBFC'))
+
+    def test_weighted(self):
+        actual = list(funcs.roundrobin('ABCDE', 'xyz', weights=[2, 1]))
+        self.assertEqual(actual, list('ABxCDyEz'))
+        actual = list(funcs.roundrobin('ABC', 'xyzw', '12', weights=[2, 1, 0]))
+        self.assertEqual(actual, list('ABxCyzw'))
+
+    def test_infinite(self):
+        actual = list(islice(funcs.roundrobin(count(), 'ab', weights=[3, 1]), 10))
+        self.assertEqual(actual, [0, 1, 2, 'a', 3, 4, 5, 'b', 6, 7])
+
+    def test_invalid_weights(self):
+        self.assertRaises(ValueError, funcs.roundrobin, 'a', 'b', weights=[1])
+        self.assertRaises(ValueError, funcs.roundrobin, 'a', weights=[-1])
+        self.assertRaises(TypeError, funcs.roundrobin, 'a', weights=[1.5])
+
+
+class MergeSortedTests(TestCase):
+    def test_matches_heapq(self):
+        inputs = [sorted((i * 7 + j * 3) % 20 for j in range(i * 5)) for i in range(12)]
+        tagged = [[(value, i, j) for j, value in enumerate(values)] for i, values in enumerate(inputs)]
+        for buffer_size in (1, 3, 1024):
+            self.assertEqual(list(funcs.merge_sorted(*inputs, buffer_size=buffer_size)), list(merge(*inputs)))
+            self.assertEqual(
+                list(funcs.merge_sorted(*tagged, key=itemgetter(0), buffer_size=buffer_size)),
+                list(merge(*tagged, key=itemgetter(0))),
+            )
+
+    def test_unique(self):
+        actual = list(funcs.merge_sorted([1, 1, 3, 5], [1, 2, 3], [5, 6], unique=True, buffer_size=2))
+        self.assertEqual(actual, [1, 2, 3, 5, 6])
+        actual = list(funcs.merge_sorted(['a', 'B'], ['A', 'b', 'C'], key=str.lower, unique=True))
+        self.assertEqual(actual, ['a', 'B', 'C'])
+
+    def test_runs(self):
+        runs = list(funcs.merge_sorted(range(0, 10, 2), range(1, 10, 2), buffer_size=3, runs=True))
+        self.assertTrue(all(runs))
+        self.assertEqual(list(chain.from_iterable(runs)), list(range(10)))
+        self.assertLessEqual(max(map(len, runs)), 6)
+
+    def test_lazy(self):
+        actual = list(islice(funcs.merge_sorted(count(0, 2), count(1, 2), buffer_size=4), 7))
+        self.assertEqual(actual, [0, 1, 2, 3, 4, 5, 6])
+
+    def test_edge_cases(self):
+        self.assertEqual(list(funcs.merge_sorted()), [])
+        self.assertEqual(list(funcs.merge_sorted([], [1], [])), [1])
+        self.assertRaises(ValueError, funcs.merge_sorted, [1], buffer_size=0)
+
+
 class RepeatEachTests(TestCase):
     def test_default(self):
         actual = list(funcs.repeat_each('ABC'))
@@ -221,6 +446,67 @@ class RepeatEachTests(TestCase):
         self.assertEqual(actual, expected)
 
 
+class RepeatEachCountsTests(TestCase):
+    def test_counts(self):
+        actual = list(funcs.repeat_each('ABCD', [2, 0, 1, -1]))
+        self.assertEqual(actual, ['A', 'A', 'C'])
+        actual = list(islice(funcs.repeat_each(cycle('AB'), (i % 3 for i in count(1))), 6))
+        self.assertEqual(actual, ['A', 'B', 'B', 'B', 'A', 'A'])
+
+    def test_array(self):
+        actual = funcs.repeat_each(array('i', [1, 2, 3]), [1, 0, 2])
+        self.assertEqual(actual, array('i', [1, 3, 3]))
+        self.assertEqual(funcs.repeat_each(array('d', [0.5]), 3), array('d', [0.5] * 3))
+        self.assertEqual(funcs.repeat_each(array('u', 'ab'), iter([2, 1])), array('u', 'aab'))
+
+    @skipIf(funcs.np is None, 'NumPy is not installed')
+    def test_numpy(self):
+        np = funcs.np
+        actual = funcs.repeat_each(np.array([1, 2, 3]), np.array([3, -1, 1, 5]))
+        self.assertEqual(actual.tolist(), [1, 1, 1, 3])
+        self.assertEqual(funcs.repeat_each(np.arange(2), -2).tolist(), [])
+        self.assertEqual(funcs.repeat_each(np.arange(3), count(1)).tolist(), [0, 1, 1, 2, 2, 2])
+
+    def test_instrumented(self):
+        funcs.instrument('repeat_each')
+        self.addCleanup(funcs.reset_metrics)
+        self.addCleanup(funcs.uninstrument)
+        self.assertEqual(funcs.repeat_each(array('b', [1]), 2), array('b', [1, 1]))
+        self.assertEqual(funcs.metrics_snapshot()['repeat_each']['items'], 2)
+
+
+class RunLengthEncodeTests(TestCase):
+    def test_basic(self):
+        self.assertEqual(funcs.run_length_encode('aaabccd'), (list('abcd'), [3, 1, 2, 1]))
+        self.assertEqual(funcs.run_length_encode([]), ([], []))
+        self.assertEqual(funcs.run_length_encode(iter([1])), ([1], [1]))
+
+    def test_round_trip(self):
+        data = [i // 3 % 4 for i in range(100)]
+        values, counts = funcs.run_length_encode(data)
+        self.assertEqual(list(funcs.repeat_each(values, counts)), data)
+        values, counts = funcs.run_length_encode(array('h', data))
+        self.assertEqual(counts.typecode, 'q')
+        self.assertEqual(funcs.repeat_each(values, counts), array('h', data))
+
+    def test_array_without_numpy(self):
+        with patch.object(funcs, 'np', None):
+            self.assertEqual(funcs.run_length_encode(array('h', [7, 7, 2])), (array('h', [7, 2]), array('q', [2, 1])))
+            self.assertEqual(funcs.run_length_encode(array('d')), (array('d'), array('q')))
+        self.assertEqual(funcs.run_length_encode(array('u', 'aab')), (array('u', 'ab'), array('q', [2, 1])))
+
+    @skipIf(funcs.np is None, 'NumPy is not installed')
+    def test_numpy(self):
+        np = funcs.np
+        data = np.array([5, 5, 1, 1, 1, 5])
+        values, counts = funcs.run_length_encode(data)
+        self.assertEqual(values.tolist(), [5, 1, 5])
+        self.assertEqual(counts.tolist(), [2, 3, 1])
+        self.assertTrue(np.array_equal(funcs.repeat_each(values, counts), data))
+        values, counts = funcs.run_length_encode(np.array([], dtype=float))
+        self.assertEqual((len(values), len(counts)), (0, 0))
+
+
 class StrictlyNTests(TestCase):
     def test_basic(self):
         iterable = ['a', 'b', 'c', 'd']
@@ -425,6 +711,59 @@ class SplitAfterTest(TestCase):
             actual = list(funcs.split_after(*args))
             self.assertEqual(actual, expected)
 
+    def test_list_matches_generic(self):
+        data = list('a,b,c,d,')
+        for max_split in (-1, 0, 1, 2, 3, 4, 10):
+            for pred in (lambda c: c == ',', ','):
+                with self.subTest(max_split=max_split, pred=pred):
+                    actual = list(funcs.split_after(data, pred, max_split))
+                    expected = list(funcs.split_after(iter(data), pred, max_split))
+                    self.assertEqual(actual, expected)
+
+    def test_separator_value(self):
+        actual = list(funcs.split_after('a,b', ','))
+        self.assertEqual(actual, [['a', ','], ['b']])
+
+    def test_finished_after_error(self):
+        it = funcs.split_after(iter([1, 0, 3, 4]), lambda x: 4 % x == 0)
+        self.assertEqual(next(it), [1])
+        self.assertRaises(ZeroDivisionError, next, it)
+        self.assertEqual(list(it), [])
+
+    def test_bytes_views(self):
+        data = b'rec1\nrec2\nrec3'
+        for pred in (b'\n', ord('\n'), lambda c: c == ord('\n')):
+            with self.subTest(pred=pred):
+                actual = list(funcs.split_after(data, pred))
+                self.assertTrue(all(isinstance(part, memoryview) for part in actual))
+                self.assertEqual([bytes(part) for part in actual], [b'rec1\n', b'rec2\n', b'rec3'])
+        actual = [bytes(part) for part in funcs.split_after(data, b'\n', 1)]
+        self.assertEqual(actual, [b'rec1\n', b'rec2\nrec3'])
+        actual = [bytes(part) for part in funcs.split_after(bytearray(b'a--b--'), b'--')]
+        self.assertEqual(actual, [b'a--', b'b--'])
+
+    def test_array_separator(self):
+        actual = [part.tolist() for part in funcs.split_after(array('i', [1, 0, 2, 0]), 0)]
+        self.assertEqual(actual, [[1, 0], [2, 0]])
+
+    @skipIf(funcs.np is None, 'ndarray input needs numpy')
+    def test_ndarray_separator(self):
+        data = funcs.np.array([1, 0, 2, 3, 0, 4])
+        actual = [part.tolist() for part in funcs.split_after(data, 0)]
+        self.assertEqual(actual, [[1, 0], [2, 3, 0], [4]])
+        data = funcs.np.array([[1, 0], [0, 0], [2, 2]])
+        actual = [part.tolist() for part in funcs.split_after(data, lambda row: row[0] == 0)]
+        self.assertEqual(actual, [[[1, 0], [0, 0]], [[2, 2]]])
+
+    def test_byte_buffer_separator(self):
+        for data in (memoryview(b'a\nb\nc'), array('B', b'a\nb\nc'), memoryview(b'a\nb\nc').cast('c'),
+                     memoryview(b'a-\n-b-\n-c-')[::2]):
+            with self.subTest(data=data):
+                actual = [bytes(part) for part in funcs.split_after(data, b'\n')]
+                self.assertEqual(actual, [b'a\n', b'b\n', b'c'])
+        actual = [bytes(part) for part in funcs.split_after(array('b', b'a--b--'), b'--')]
+        self.assertEqual(actual, [b'a--', b'b--'])
+
 
 class SplitIntoTests(TestCase):
     def test_iterable_just_right(self):
@@ -545,6 +884,15 @@ class SplitIntoTests(TestCase):
         sizes_actual = list(sizes)
         self.assertEqual(sizes_actual, sizes_expected)
 
+    def test_bytes_views(self):
+        actual = list(funcs.split_into(b'headerbodytail', [6, 4, None]))
+        self.assertTrue(all(isinstance(part, memoryview) for part in actual))
+        self.assertEqual([bytes(part) for part in actual], [b'header', b'body', b'tail'])
+
+    def test_negative_in_sizes(self):
+        with self.assertRaises(ValueError):
+            list(funcs.split_into([1, 2, 3], [1, -1]))
+
 
 class MapIFTests(TestCase):
     def test_without_func_else(self):
@@ -564,6 +912,187 @@ class MapIFTests(TestCase):
         expected = []
         self.assertEqual(actual, expected)
 
+    def test_finished_after_error(self):
+        for data, pred, func, first in (
+            ([2, 0, 1], lambda x: 1 / x, _square, 4),
+            ([2, 1, 0], _is_odd, lambda x: 1 / (x - 1), 2),
+        ):
+            with self.subTest(data=data):
+                it = funcs.map_if(data, pred, func)
+                self.assertEqual(next(it), first)
+                self.assertRaises(ZeroDivisionError, next, it)
+                self.assertEqual(list(it), [])
+
+
+class ParallelMapIfTests(TestCase):
+    def test_threads_ordered(self):
+        with ThreadPoolExecutor(4) as executor:
+            actual = list(funcs.map_if(range(100), _is_odd, _square, executor=executor, window=3))
+        expected = list(funcs.map_if(range(100), _is_odd, _square))
+        self.assertEqual(actual, expected)
+
+    def test_threads_unordered(self):
+        def slow_square(x):
+            sleep(0.01 * (x % 3))
+            return x * x
+
+        with ThreadPoolExecutor(4) as executor:
+            actual = list(funcs.map_if(
+                range(30), _is_odd, slow_square, executor=executor, ordered=False
+            ))
+        expected = list(funcs.map_if(range(30), _is_odd, _square))
+        self.assertNotEqual(actual, [])
+        self.assertEqual(sorted(actual), sorted(expected))
+
+    def test_processes_batched(self):
+        with ProcessPoolExecutor(2) as executor:
+            actual = list(funcs.map_if(
+                range(50), _is_odd, _square, executor=executor, batch_size=8
+            ))
+        expected = list(funcs.map_if(range(50), _is_odd, _square))
+        self.assertEqual(actual, expected)
+
+    def test_processes_bytes(self):
+        with ProcessPoolExecutor(2) as executor:
+            actual = list(funcs.map_if(b'abcdef', _is_odd, _square, executor=executor, batch_size=4))
+        self.assertEqual(actual, list(funcs.map_if(b'abcdef', _is_odd, _square)))
+
+    def test_bounded_window_on_infinite_input(self):
+        submitted = []
+
+        def record(x):
+            submitted.append(x)
+            return x
+
+        with ThreadPoolExecutor(2) as executor:
+            results = funcs.map_if(count(), _is_odd, record, executor=executor, window=4)
+            self.assertEqual(funcs.take(results, 5), [0, 1, 2, 3, 4])
+            del results
+        self.assertLessEqual(len(submitted), 5)
+
+    def test_invalid_arguments(self):
+        with ThreadPoolExecutor(1) as executor:
+            self.assertRaises(ValueError, lambda: funcs.map_if([], _is_odd, _square, executor=executor, window=0))
+            self.assertRaises(ValueError, lambda: funcs.map_if([], _is_odd, _square, executor=executor, batch_size=0))
+
+
+class MmapTests(TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = path.join(directory.name, 'data.bin')
+
+    def write(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def test_records(self):
+        self.write(b'one\ntwo\nthree')
+        records = list(funcs.mmap_records(self.path))
+        self.assertTrue(all(isinstance(record, memoryview) for record in records))
+        self.assertEqual([bytes(record) for record in records], [b'one\n', b'two\n', b'three'])
+
+    def test_custom_separator(self):
+        self.write(b'a||b||')
+        actual = [bytes(record) for record in funcs.mmap_records(self.path, b'||')]
+        self.assertEqual(actual, [b'a||', b'b||'])
+
+    def test_chunks(self):
+        self.write(bytes(range(10)))
+        actual = [bytes(chunk) for chunk in funcs.mmap_chunks(self.path, 4)]
+        self.assertEqual(actual, [bytes(range(4)), bytes(range(4, 8)), bytes(range(8, 10))])
+
+    def test_release_pages(self):
+        self.write(b'x' * 9999 + b'\n' + b'y' * 20000)
+        actual = [record.nbytes for record in funcs.mmap_records(self.path, release_bytes=4096)]
+        self.assertEqual(actual, [10000, 20000])
+
+    def test_empty_file(self):
+        self.write(b'')
+        self.assertEqual(list(funcs.mmap_records(self.path)), [])
+        self.assertEqual(list(funcs.mmap_chunks(self.path, 4)), [])
+
+    def test_early_close(self):
+        self.write(b'a\nb\nc\n')
+        records = funcs.mmap_records(self.path)
+        self.assertEqual(bytes(next(records)), b'a\n')
+        records.close()
+
+
+class ChunkedAdaptiveTests(TestCase):
+    def test_count(self):
+        actual = list(funcs.chunked_adaptive(range(7), 3))
+        self.assertEqual(actual, [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_bytes(self):
+        records = [b'aaaa', b'bb', b'cccccc', b'd', b'ee']
+        actual = list(funcs.chunked_adaptive(records, max_bytes=6, sizeof=len))
+        self.assertEqual(actual, [[b'aaaa', b'bb'], [b'cccccc'], [b'd', b'ee']])
+
+    def test_bytes_with_count(self):
+        records = [b'a'] * 5
+        actual = list(funcs.chunked_adaptive(records, 2, max_bytes=100, sizeof=len))
+        self.assertEqual(actual, [[b'a', b'a'], [b'a', b'a'], [b'a']])
+
+    def test_seconds(self):
+        def generator():
+            yield 1
+            yield 2
+            sleep(0.05)
+            yield 3
+            yield 4
+
+        actual = list(funcs.chunked_adaptive(generator(), max_seconds=0.04))
+        self.assertEqual(actual, [[1, 2, 3], [4]])
+
+    def test_invalid_n(self):
+        self.assertRaises(ValueError, lambda: list(funcs.chunked_adaptive([1], 0)))
+
+
+class MapChunkedTests(TestCase):
+    def test_ordered_results(self):
+        def total(chunk):
+            sleep(0.01 * (len(chunk) % 2))
+            return sum(chunk)
+
+        with ThreadPoolExecutor(4) as executor:
+            actual = list(funcs.map_chunked(range(10), 3, total, executor=executor, window=2))
+        self.assertEqual(actual, [3, 12, 21, 9])
+
+    def test_processes(self):
+        with ProcessPoolExecutor(2) as executor:
+            actual = list(funcs.map_chunked(list(range(10)), 5, sum, executor=executor))
+        self.assertEqual(actual, [10, 35])
+
+    def test_processes_bytes(self):
+        with ProcessPoolExecutor(2) as executor:
+            actual = list(funcs.map_chunked(b'abcd', 2, sum, executor=executor))
+            self.assertEqual(actual, [ord('a') + ord('b'), ord('c') + ord('d')])
+            actual = list(funcs.map_chunked(array('d', [1, 2, 3]), 2, sum, executor=executor))
+        self.assertEqual(actual, [3.0, 3.0])
+
+    def test_strict(self):
+        with ThreadPoolExecutor(2) as executor:
+            results = funcs.map_chunked('ABCDE', 2, ''.join, executor=executor, strict=True)
+            self.assertEqual(next(results), 'AB')
+            self.assertEqual(next(results), 'CD')
+            self.assertRaisesRegex(ValueError, 'iterator is not divisible by n', lambda: next(results))
+
+    def test_adaptive(self):
+        records = [b'aaaa', b'bb', b'cccccc']
+        with ThreadPoolExecutor(2) as executor:
+            actual = list(funcs.map_chunked(
+                records, None, len, executor=executor, max_bytes=6, sizeof=len
+            ))
+        self.assertEqual(actual, [2, 1])
+
+    def test_strict_adaptive(self):
+        with ThreadPoolExecutor(1) as executor:
+            self.assertRaises(
+                ValueError,
+                lambda: funcs.map_chunked([], 2, len, executor=executor, strict=True, max_bytes=1)
+            )
+
 
 class TimeLimitedTests(TestCase):
     def test_basic(self):
@@ -586,6 +1115,15 @@ class TimeLimitedTests(TestCase):
         self.assertEqual(actual, expected)
         self.assertFalse(iterable.timed_out)
 
+    def test_public_type(self):
+        with funcs.time_limited(10, count()) as iterable:
+            self.assertIsInstance(iterable, funcs.time_limited)
+            self.assertEqual(next(iterable), 0)
+            iterable.limit_seconds = 0
+            self.assertEqual(iterable.limit_seconds, 0)
+            self.assertEqual(list(iterable), [])
+            self.assertTrue(iterable.timed_out)
+
     def test_zero_limit(self):
         iterable = funcs.time_limited(0, count())
         actual = list(iterable)
@@ -597,6 +1135,133 @@ class TimeLimitedTests(TestCase):
         with self.assertRaises(ValueError):
             list(funcs.time_limited(-0.1, count()))
 
+    def test_item_timeout_requires_preemptive(self):
+        with self.assertRaises(ValueError):
+            funcs.time_limited(1, count(), item_timeout=0.1)
+
+
+class PreemptiveTimeLimitedTests(TestCase):
+    def test_basic(self):
+        def generator():
+            yield 1
+            yield 2
+            sleep(0.2)
+            yield 3
+
+        iterable = funcs.time_limited(0.1, generator(), preemptive=True)
+        actual = list(iterable)
+        self.assertEqual(actual, [1, 2])
+        self.assertTrue(iterable.timed_out)
+
+    def test_slow_producer(self):
+        def generator():
+            yield 1
+            sleep(2)
+            yield 2
+
+        start = monotonic()
+        iterable = funcs.time_limited(0.1, generator(), preemptive=True)
+        self.assertEqual(list(iterable), [1])
+        self.assertLess(monotonic() - start, 1)
+        self.assertTrue(iterable.timed_out)
+        self.assertEqual(iterable.remaining, 0)
+
+    def test_item_timeout(self):
+        def generator():
+            yield 1
+            sleep(0.5)
+            yield 2
+
+        iterable = funcs.time_limited(10, generator(), preemptive=True, item_timeout=0.05)
+        self.assertEqual(list(iterable), [1])
+        self.assertTrue(iterable.timed_out)
+        self.assertGreater(iterable.remaining, 0)
+
+    def test_complete(self):
+        iterable = funcs.time_limited(2, iter(range(10)), preemptive=True, buffer_size=4)
+        self.assertEqual(list(iterable), list(range(10)))
+        self.assertFalse(iterable.timed_out)
+
+    def test_buffer_size_validated(self):
+        for buffer_size in (0, -1):
+            with self.subTest(buffer_size=buffer_size):
+                self.assertRaises(ValueError, funcs.time_limited, 1, [], preemptive=True, buffer_size=buffer_size)
+
+    def test_zero_limit(self):
+        iterable = funcs.time_limited(0, count(), preemptive=True)
+        self.assertEqual(list(iterable), [])
+        self.assertTrue(iterable.timed_out)
+
+    def test_producer_error(self):
+        def generator():
+            yield 1
+            raise KeyError('boom')
+
+        iterable = funcs.time_limited(2, generator(), preemptive=True)
+        self.assertEqual(next(iterable), 1)
+        self.assertRaises(KeyError, lambda: next(iterable))
+
+    def test_abandoned_stops_producer(self):
+        before = threading.active_count()
+        for _ in range(5):
+            iterable = funcs.time_limited(10, count(), preemptive=True)
+            next(iterable)
+            del iterable
+        with funcs.time_limited(10, count(), preemptive=True) as iterable:
+            next(iterable)
+        deadline = monotonic() + 2
+        while threading.active_count() > before and monotonic() < deadline:
+            sleep(0.01)
+        self.assertLessEqual(threading.active_count(), before)
+
+
+class ReplayableTests(TestCase):
+    def test_peek_prepend(self):
+        it = funcs.replayable('abc')
+        self.assertEqual(it.peek(), 'a')
+        it.prepend(1, 2)
+        self.assertEqual(it.peek(), 1)
+        self.assertEqual(list(it), [1, 2, 'a', 'b', 'c'])
+        self.assertEqual(it.peek(None), None)
+        self.assertRaises(StopIteration, it.peek)
+
+    def test_cursors_independent(self):
+        it = funcs.replayable(iter(range(10)))
+        next(it)
+        c = it.cursor()
+        self.assertEqual(funcs.first(c.cursor()), 1)
+        self.assertEqual(list(islice(it, 3)), [1, 2, 3])
+        self.assertEqual(list(c), list(range(1, 10)))
+        self.assertEqual(list(it), list(range(4, 10)))
+
+    def test_cursor_copies_pushed(self):
+        it = funcs.replayable([1, 2])
+        it.prepend(0)
+        c = it.cursor()
+        self.assertEqual(list(it), [0, 1, 2])
+        self.assertEqual(list(c), [0, 1, 2])
+
+    def test_spill(self):
+        it = funcs.replayable(range(1000), max_items=10)
+        cursors = [it.cursor(), it.cursor()]
+        self.assertEqual(list(it), list(range(1000)))
+        self.assertTrue(it._buffer.segments)
+        self.assertLessEqual(len(it._buffer.memory), 10)
+        self.assertEqual(list(cursors[0]), list(range(1000)))
+        self.assertEqual(list(cursors[1]), list(range(1000)))
+        it.close()
+
+    def test_release(self):
+        it = funcs.replayable(range(10000), max_items=None)
+        c = it.cursor()
+        self.assertEqual(list(islice(it, 5000)), list(range(5000)))
+        del c
+        self.assertEqual(list(it), list(range(5000, 10000)))
+        self.assertEqual(it._buffer.memory, [])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, funcs.replayable, [], max_items=0)
+
 
 class DifferenceTests(TestCase):
     def test_normal(self):
@@ -631,6 +1296,275 @@ class DifferenceTests(TestCase):
         self.assertEqual(actual, original)
 
 
+class VectorizedDifferenceTests(TestCase):
+    def assertSameOutput(self, iterable, *args, **kwargs):
+        expected = list(funcs.difference(iter(list(iterable)), *args, **kwargs))
+        actual = list(funcs.difference(iterable, *args, vectorize=True, block_size=7, **kwargs))
+        self.assertEqual(actual, expected)
+        self.assertEqual(list(map(type, actual)), list(map(type, expected)))
+
+    def test_lists(self):
+        self.assertSameOutput([10, 20, 30, 40, 50])
+        self.assertSameOutput([0.5 * i * i for i in range(50)])
+        self.assertSameOutput([1, 2.5, 4])
+        self.assertSameOutput([2 ** 70, -1, 2 ** 63, 5] * 5)
+        self.assertSameOutput([10, 20, 30, 40, 50], add)
+        self.assertSameOutput([])
+        self.assertSameOutput([0])
+
+    def test_arrays(self):
+        self.assertSameOutput(array('B', [255, 0, 7, 1] * 10))
+        self.assertSameOutput(array('f', [0.1, 0.7, 1.3] * 10))
+        self.assertSameOutput(array('q', [2 ** 62, -2 ** 62] * 10))
+
+    @skipIf(funcs.np is None, 'ndarray input needs numpy')
+    def test_ndarray(self):
+        data = funcs.np.arange(100) ** 2
+        actual = list(funcs.difference(data, vectorize=True, block_size=16))
+        self.assertEqual(actual, list(funcs.difference(data)))
+
+    def test_iterator(self):
+        expected = list(funcs.difference(x * 3 for x in range(100)))
+        actual = list(funcs.difference((x * 3 for x in range(100)), vectorize=True, block_size=7))
+        self.assertEqual(actual, expected)
+
+    def test_roundtrip(self):
+        original = list(range(100))
+        actual = list(funcs.difference(accumulate(original), vectorize=True, block_size=9))
+        self.assertEqual(actual, original)
+
+    def test_initial(self):
+        original = list(range(100))
+        accumulated = accumulate(original, initial=100)
+        actual = list(funcs.difference(accumulated, initial=100, vectorize=True, block_size=9))
+        self.assertEqual(actual, original)
+
+    def test_non_ufunc(self):
+        self.assertSameOutput([10, 20, 30], lambda a, b: a * b)
+
+    def test_block_size_validated(self):
+        for block_size in (0, -1):
+            with self.subTest(block_size=block_size):
+                self.assertRaises(ValueError, funcs.difference, [1, 2], vectorize=True, block_size=block_size)
+                self.assertRaises(ValueError, funcs.RunningStats, [1, 2], block_size=block_size)
+
+
+class ParallelScanTests(TestCase):
+    def test_array_roundtrip(self):
+        data = array('q', accumulate(range(-500, 500)))
+        with ProcessPoolExecutor(2) as executor:
+            diffs = funcs.parallel_difference(data, executor=executor, shards=7)
+            self.assertEqual(diffs.tolist(), list(funcs.difference(data)))
+            self.assertEqual(funcs.parallel_accumulate(diffs, executor=executor, shards=5), data)
+
+    def test_initial(self):
+        data = array('l', range(100))
+        with ThreadPoolExecutor(2) as executor:
+            actual = funcs.parallel_difference(data, initial=0, executor=executor, shards=3)
+            self.assertEqual(actual.tolist(), list(funcs.difference(data, initial=0)))
+            actual = funcs.parallel_accumulate(data, initial=10, executor=executor, shards=3)
+            self.assertEqual(actual.tolist(), list(accumulate(data, initial=10)))
+
+    def test_python_func(self):
+        data = array('l', range(50))
+        with ProcessPoolExecutor(2) as executor:
+            actual = funcs.parallel_difference(data, _double_minus, executor=executor, shards=4)
+            self.assertEqual(actual.tolist(), list(funcs.difference(data, _double_minus)))
+            actual = funcs.parallel_accumulate(data[::-1], max, executor=executor, shards=4)
+            self.assertEqual(actual.tolist(), [49] * 50)
+
+    def test_narrow_integers_widen(self):
+        data = bytes([5, 3, 250, 1])
+        with ThreadPoolExecutor(2) as executor:
+            actual = funcs.parallel_difference(data, executor=executor, shards=2)
+            self.assertEqual(actual, array('q', funcs.difference(data)))
+            actual = funcs.parallel_accumulate(array('b', [100] * 3), executor=executor, shards=2)
+            self.assertEqual(actual, array('q', [100, 200, 300]))
+            if funcs.np is not None:
+                actual = funcs.parallel_difference(funcs.np.array([100, -100, 100], dtype=funcs.np.int8), executor=executor)
+                self.assertEqual(actual.tolist(), [100, -200, 200])
+
+    def test_errors_unlink(self):
+        blocks = []
+        shared_block = funcs._shared_block
+
+        def record(*args):
+            blocks.append(shared_block(*args))
+            return blocks[-1]
+
+        data = array('q', [3, 1, 4])
+        with ThreadPoolExecutor(2) as executor, patch.object(funcs, '_shared_block', record):
+            self.assertRaises(ValueError, funcs.parallel_difference, data, executor=executor, shards=0)
+            self.assertRaises(TypeError, funcs.parallel_accumulate, data, initial=0.5, executor=executor)
+            self.assertRaises(ZeroDivisionError, funcs.parallel_difference, array('q', [3, 0, 4]), floordiv, executor=executor)
+            self.assertRaises(OverflowError, funcs.parallel_accumulate, array('q', [2 ** 62] * 2), executor=executor)
+            if funcs.np is not None:
+                huge = funcs.np.array([2 ** 63, 1], dtype=funcs.np.uint64)
+                self.assertRaises(OverflowError, funcs.parallel_difference, huge, executor=executor)
+        self.assertTrue(blocks)
+        for block in blocks:
+            self.assertRaises(FileNotFoundError, funcs.SharedMemory, block.name)
+
+    def test_error_keeps_process_pool(self):
+        data = array('q', [1, 0] * 50)
+        with ProcessPoolExecutor(2) as executor:
+            self.assertRaises(ZeroDivisionError, funcs.parallel_difference, data, floordiv, executor=executor, shards=50)
+            actual = funcs.parallel_accumulate(data, executor=executor, shards=10)
+        self.assertEqual(actual, array('q', accumulate(data)))
+
+    @skipIf(funcs.np is None, 'ndarray input needs numpy')
+    def test_bool_widens(self):
+        np = funcs.np
+        with ThreadPoolExecutor(2) as executor:
+            actual = funcs.parallel_accumulate(np.array([True, True, False, True]), executor=executor)
+            self.assertEqual(actual.tolist(), [1, 2, 2, 3])
+            actual = funcs.parallel_difference(np.array([True, False, True]), executor=executor)
+            self.assertEqual(actual.tolist(), [1, -1, 1])
+
+    @skipIf(funcs.np is None, 'ndarray input needs numpy')
+    def test_ndarray_identical(self):
+        np = funcs.np
+        data = np.random.default_rng(0).integers(-2 ** 40, 2 ** 40, size=10001)
+        expected = np.concatenate([data[:1], np.subtract(data[1:], data[:-1])])
+        with ThreadPoolExecutor(4) as executor:
+            diffs = funcs.parallel_difference(data, executor=executor, shards=9)
+            self.assertEqual(diffs.tobytes(), expected.tobytes())
+            self.assertEqual(funcs.parallel_accumulate(diffs, executor=executor, shards=9).tobytes(), data.tobytes())
+
+    @skipIf(funcs.np is None, 'ndarray input needs numpy')
+    def test_memmap(self):
+        np = funcs.np
+        with TemporaryDirectory() as tmp:
+            filename = path.join(tmp, 'data.npy')
+            np.save(filename, np.arange(1000, dtype=np.int32) ** 2)
+            data = np.load(filename, mmap_mode='r')
+            with ProcessPoolExecutor(2) as executor:
+                actual = funcs.parallel_difference(data, executor=executor, shards=4)
+            self.assertEqual(actual.tolist(), list(funcs.difference(data.tolist())))
+            del data
+
+    def test_empty(self):
+        self.assertEqual(funcs.parallel_difference(array('d')), array('d'))
+        self.assertEqual(funcs.parallel_accumulate(array('d')), array('d'))
+
+
+class WindowedTests(TestCase):
+    def test_tuples(self):
+        self.assertEqual(list(funcs.windowed(range(5), 3)), [(0, 1, 2), (1, 2, 3), (2, 3, 4)])
+        self.assertEqual(list(funcs.windowed(iter(range(8)), 3, 2)), [(0, 1, 2), (2, 3, 4), (4, 5, 6)])
+        self.assertEqual(list(funcs.windowed(range(10), 2, 4)), [(0, 1), (4, 5), (8, 9)])
+        self.assertEqual(list(funcs.windowed([1, 2], 3)), [])
+
+    def test_views(self):
+        windows = list(funcs.windowed(b'abcde', 3, view=True))
+        self.assertEqual([bytes(window) for window in windows], [b'abc', b'bcd', b'cde'])
+        self.assertTrue(windows[0].readonly)
+        data = [1, 2, 3, 4]
+        windows = list(funcs.windowed(data, 2, 2, view=True))
+        self.assertIsInstance(windows[0], funcs.SequenceView)
+        data[0] = 9
+        self.assertEqual([list(window) for window in windows], [[9, 2], [3, 4]])
+
+    def test_iterator_view_is_live(self):
+        seen = [list(window) for window in funcs.windowed(iter('abcd'), 2, view=True)]
+        self.assertEqual(seen, [['a', 'b'], ['b', 'c'], ['c', 'd']])
+
+    @skipIf(funcs.np is None, 'NumPy is not installed')
+    def test_numpy_views(self):
+        arr = funcs.np.arange(6)
+        windows = funcs.windowed(arr, 3, 2, view=True)
+        self.assertEqual(windows.tolist(), [[0, 1, 2], [2, 3, 4]])
+        self.assertFalse(windows.flags.writeable)
+        self.assertEqual(funcs.windowed(arr, 7, view=True).shape, (0, 7))
+
+    def test_aggregates(self):
+        data = [3, 1, 4, 1, 5, 9, 2, 6]
+        self.assertEqual(list(funcs.windowed(data, 3, aggregate='sum')), [8, 6, 10, 15, 16, 17])
+        self.assertEqual(list(funcs.windowed(iter(data), 3, 2, aggregate='min')), [1, 1, 2])
+        self.assertEqual(list(funcs.windowed(data, 3, 2, aggregate='max')), [4, 5, 9])
+        self.assertEqual(list(islice(funcs.windowed(count(), 2, aggregate='max'), 3)), [1, 2, 3])
+
+    @skipIf(funcs.np is None, 'NumPy is not installed')
+    def test_numpy_aggregates(self):
+        data = funcs.np.array([3, 1, 4, 1, 5, 9, 2, 6])
+        self.assertEqual(funcs.windowed(data, 3, aggregate='sum').tolist(), [8, 6, 10, 15, 16, 17])
+        self.assertEqual(funcs.windowed(data, 3, 2, aggregate='min').tolist(), [1, 1, 2])
+        self.assertEqual(funcs.windowed(data, 5, aggregate='max').tolist(), [5, 9, 9, 9])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, funcs.windowed, [], 0)
+        self.assertRaises(ValueError, funcs.windowed, [], 1, 0)
+        self.assertRaises(ValueError, funcs.windowed, [], 1, aggregate='mean')
+        self.assertRaises(ValueError, funcs.windowed, [], 1, view=True, aggregate='sum')
+
+
+class RunningStatsTests(TestCase):
+    def test_moments(self):
+        data = [(i * 37 % 101) / 7 for i in range(10000)]
+        stats = funcs.RunningStats(data, block_size=333)
+        self.assertEqual(stats.count, len(data))
+        self.assertAlmostEqual(stats.mean, statistics.mean(data))
+        self.assertAlmostEqual(stats.variance, statistics.variance(data))
+        self.assertAlmostEqual(stats.pvariance, statistics.pvariance(data))
+        self.assertEqual((stats.min, stats.max), (min(data), max(data)))
+
+    def test_float_moments(self):
+        data = [Decimal(i) / 8 for i in range(100)]
+        stats = funcs.RunningStats(data, block_size=7)
+        self.assertEqual(stats.total, sum(data))
+        self.assertAlmostEqual(stats.mean, float(statistics.mean(data)))
+        self.assertAlmostEqual(stats.variance, float(statistics.variance(data)))
+        self.assertEqual((stats.min, stats.max), (data[0], data[-1]))
+        stats = funcs.RunningStats([2 ** 80, 2 ** 80 + 2])
+        self.assertEqual(stats.total, 2 ** 81 + 2)
+        self.assertEqual(stats.mean, 2.0 ** 80)
+        self.assertRaises(OverflowError, funcs.RunningStats, [10 ** 400])
+
+    def test_difference_sink(self):
+        counters = list(accumulate(i % 13 for i in range(1000)))
+        stats = funcs.RunningStats(funcs.difference(counters, initial=0))
+        self.assertEqual(stats.total, counters[-1] - counters[0])
+        self.assertEqual(stats.snapshot()['count'], 999)
+
+    def test_quantiles(self):
+        data = list(range(100000))
+        stats = funcs.RunningStats(reversed(data), quantiles=(0.1, 0.5), seed=0)
+        for q, value in stats.snapshot()['quantiles'].items():
+            self.assertLess(abs(value / len(data) - q), 0.01)
+        self.assertLess(sum(map(len, stats._sketch.levels)), 2000)
+        self.assertRaises(ValueError, stats.quantile, 1.5)
+
+    def test_merge(self):
+        data = [i * 7919 % 1000 for i in range(20000)]
+        whole = funcs.RunningStats(data, seed=0)
+        shards = [funcs.RunningStats(data[i::4], seed=i) for i in range(4)]
+        merged = funcs.RunningStats()
+        for shard in shards:
+            merged.merge(pickle.loads(pickle.dumps(shard)))
+        self.assertEqual(merged.count, whole.count)
+        self.assertEqual(merged.total, whole.total)
+        self.assertAlmostEqual(merged.variance, whole.variance)
+        self.assertEqual((merged.min, merged.max), (0, 999))
+        self.assertLess(abs(merged.quantile(0.5) - 500), 20)
+
+    def test_empty_and_add(self):
+        stats = funcs.RunningStats()
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['count'], 0)
+        self.assertIsNone(snapshot['mean'])
+        self.assertIsNone(snapshot['quantiles'][0.5])
+        stats.add(3).add(5)
+        self.assertEqual((stats.mean, stats.variance, stats.quantile(0)), (4.0, 2.0, 3))
+
+    @skipIf(funcs.np is None, 'NumPy is not installed')
+    def test_numpy(self):
+        data = funcs.np.arange(10000, dtype=float).reshape(100, 100)
+        stats = funcs.RunningStats(data, block_size=1000)
+        self.assertEqual(stats.count, 10000)
+        self.assertAlmostEqual(stats.variance, statistics.variance(range(10000)))
+        self.assertEqual(stats.max, 9999.0)
+
+
 class ValueChainTest(TestCase):
     def test_empty(self):
         actual = list(funcs.value_chain())
@@ -663,6 +1597,106 @@ class ValueChainTest(TestCase):
         expected = [1, (2, (3,)), 'foo', ['bar', ['baz']], 'tic', 'key', obj]
         self.assertEqual(actual, expected)
 
+    def test_max_depth(self):
+        args = (1, [2, [3, [4, 'ab']]], 'cd', (5,))
+        self.assertEqual(list(funcs.value_chain(*args, max_depth=0)), list(args))
+        self.assertEqual(list(funcs.value_chain(*args, max_depth=2)), [1, 2, 3, [4, 'ab'], 'cd', 5])
+        self.assertEqual(list(funcs.value_chain(*args, max_depth=None)), [1, 2, 3, 4, 'ab', 'cd', 5])
+        self.assertRaises(ValueError, funcs.value_chain, 1, max_depth=-1)
+
+    def test_runs(self):
+        for step in (1, 2, 3, 50):
+            args = [[i, [i]] if i % step == 0 else i for i in range(200)]
+            expected = [x for arg in args for x in (arg if isinstance(arg, list) else [arg])]
+            self.assertEqual(list(funcs.value_chain(*args)), expected)
+
+    def test_lazy(self):
+        self.assertEqual(list(islice(funcs.value_chain(0, count(1)), 3)), [0, 1, 2])
+        self.assertEqual(list(islice(funcs.value_chain([count()], max_depth=2), 3)), [0, 1, 2])
+
+    def test_getitem_iterable(self):
+        class Squares:
+            def __getitem__(self, i):
+                if i >= 3:
+                    raise IndexError
+                return i * i
+
+        self.assertEqual(list(funcs.value_chain(Squares(), 9, Squares())), [0, 1, 4, 9, 0, 1, 4])
+
+    def test_iteration_type_error(self):
+        class Lazy:
+            def __iter__(self):
+                raise TypeError('not iterable after all')
+                yield
+
+        lazy = Lazy()
+        self.assertEqual(list(funcs.value_chain(1, lazy, [lazy], max_depth=None)), [1, lazy, lazy])
+        self.assertEqual(list(funcs.Pipeline([lazy, [2]]).value_chain().map(str)), [str(lazy), '2'])
+
+    def test_late_type_error_propagates(self):
+        def broken():
+            yield 1
+            raise TypeError('bad item')
+
+        actual = funcs.value_chain(0, broken())
+        self.assertEqual(next(actual), 0)
+        self.assertEqual(next(actual), 1)
+        self.assertRaises(TypeError, next, actual)
+        self.assertRaises(TypeError, list, funcs.value_chain([broken()], max_depth=None))
+
+    @skipIf(funcs.np is None, 'ndarray input needs numpy')
+    def test_ndarray_per_instance(self):
+        np = funcs.np
+        for arrays in ((np.array([1, 2]), np.array(5)), (np.array(5), np.array([1, 2]))):
+            for value in arrays:
+                expected = [value] if value.ndim == 0 else list(value)
+                self.assertEqual(list(funcs.value_chain(value)), expected)
+                self.assertEqual(list(funcs.Pipeline([value]).value_chain().map(int)), list(map(int, expected)))
+
+
+class PipelineTests(TestCase):
+    def test_matches_nested_calls(self):
+        src = [1, [2, 3], 'ab', (4, 5, 6), 7, b'x', [8, 9, 10, 11]]
+        pred = lambda x: isinstance(x, int) and x % 3 == 0
+        nested = funcs.chunked(
+            funcs.map_if(funcs.split_after(funcs.value_chain(*src), pred), lambda g: len(g) > 1, tuple, len), 2
+        )
+        pipeline = funcs.Pipeline(src).value_chain().split_after(pred).map_if(lambda g: len(g) > 1, tuple, len).chunked(2)
+        self.assertEqual(list(pipeline), list(nested))
+
+    def test_map_filter(self):
+        pipeline = funcs.Pipeline(range(10)).map(_square).filter(_is_odd).map_if(lambda x: x > 10, str)
+        self.assertEqual(list(pipeline), [1, 9, '25', '49', '81'])
+
+    def test_lazy(self):
+        pipeline = funcs.Pipeline(count()).split_after(lambda x: x % 3 == 2).map(sum)
+        self.assertEqual(list(islice(pipeline, 3)), [3, 12, 21])
+
+    def test_split_after_max_split(self):
+        for max_split in (-1, 0, 1, 2):
+            pipeline = funcs.Pipeline(iter('a,b,c')).value_chain().split_after(',', max_split)
+            self.assertEqual(list(pipeline), list(funcs.split_after('a,b,c', ',', max_split)))
+
+    def test_sliceable_source(self):
+        chunks = list(funcs.Pipeline(b'abcd').split_after(ord('b')))
+        self.assertEqual(chunks, list(funcs.split_after(b'abcd', ord('b'))))
+        self.assertIsInstance(chunks[0], memoryview)
+
+    def test_apply_and_errors(self):
+        pipeline = funcs.Pipeline([1, 2, 3]).apply(funcs.difference, initial=0).map(_square)
+        self.assertEqual(list(pipeline), [1, 1])
+        self.assertRaises(ValueError, list, funcs.Pipeline(range(5)).chunked(2, strict=True))
+        it = iter(funcs.Pipeline([1, 0, 2]).map(lambda x: 1 / x).value_chain())
+        self.assertEqual(next(it), 1)
+        self.assertRaises(ZeroDivisionError, next, it)
+
+    def test_value_chain_depth(self):
+        src = [1, [2, [3, 'ab']], (4,)]
+        for max_depth in (0, 1, 2, None):
+            pipeline = funcs.Pipeline(src).value_chain(max_depth).map(str)
+            self.assertEqual(list(pipeline), list(map(str, funcs.value_chain(*src, max_depth=max_depth))))
+
+
 class SequenceViewTest(TestCase):
     def test_init(self):
         view = funcs.SequenceView((1, 2, 3))
@@ -696,3 +1730,261 @@ class SequenceViewTest(TestCase):
         self.assertEqual(view.index('b'), 1)
         self.assertEqual(view.count('f'), 2)
 
+
+class SequenceViewWindowTests(TestCase):
+    def test_slice_is_view(self):
+        seq = list(range(10))
+        window = funcs.SequenceView(seq)[2:8:2]
+        self.assertIsInstance(window, funcs.SequenceView)
+        self.assertEqual(len(window), 3)
+        self.assertEqual(list(window), [2, 4, 6])
+        self.assertEqual(list(reversed(window)), [6, 4, 2])
+        self.assertEqual(window[-1], 6)
+        self.assertEqual(repr(window), "SequenceView([0, 1, 2, 3, 4, 5, 6, 7, 8, 9], range(2, 8, 2))")
+        seq[4] = 'x'
+        self.assertEqual(window[1], 'x')
+
+    def test_composition(self):
+        seq = tuple(range(100))
+        window = funcs.SequenceView(seq)[10:90][::-3][5:]
+        self.assertEqual(list(window), list(seq[10:90][::-3][5:]))
+        self.assertEqual(window[0], seq[10:90][::-3][5])
+        self.assertRaises(IndexError, lambda: window[len(window)])
+
+    def test_abc_methods(self):
+        targets = [
+            list('abcabcabc'), tuple('abcabcabc'), 'abcabcabc',
+            b'abcabcabc', bytearray(b'abcabcabc'), array('b', b'abcabcabc'),
+        ]
+        for target in targets:
+            for window in (slice(None), slice(1, 8), slice(None, None, -2)):
+                expected = target[window]
+                view = funcs.SequenceView(target)[window]
+                for value in set(expected):
+                    self.assertEqual(view.count(value), expected.count(value))
+                    self.assertEqual(view.index(value), list(expected).index(value))
+                    if value in expected[-3:]:
+                        self.assertEqual(view.index(value, -3), list(expected).index(value, len(expected) - 3))
+                    self.assertIn(value, view)
+                self.assertNotIn(-1, view)
+                self.assertNotIn('bc', view)
+                self.assertEqual(view.count('bc'), 0)
+                self.assertRaises(ValueError, lambda: view.index('z'))
+
+    def test_index_bounds(self):
+        view = funcs.SequenceView(b'aXbXcX')[1:]
+        self.assertEqual(view.index(ord('X')), 0)
+        self.assertEqual(view.index(ord('X'), 1), 2)
+        self.assertEqual(view.index(ord('X'), 1, -1), 2)
+        self.assertRaises(ValueError, lambda: view.index(ord('X'), 3, 4))
+        self.assertEqual(view.count(300), 0)
+
+    def test_array_index_bounds(self):
+        for version in ((3, 9), version_info[:2]):
+            with self.subTest(version=version), patch.object(funcs, 'version_info', version):
+                view = funcs.SequenceView(array('i', [7, 1, 7, 1, 7]))[1:]
+                self.assertEqual(view.index(7), 1)
+                self.assertEqual(view.index(7, 2), 3)
+                self.assertRaises(ValueError, lambda: view.index(7, 0, 1))
+
+    def test_mmap(self):
+        with TemporaryDirectory() as directory:
+            file_path = path.join(directory, 'data.bin')
+            with open(file_path, 'wb') as f:
+                f.write(b'hello world')
+            with open(file_path, 'rb') as f, funcs.mmap(f.fileno(), 0, access=funcs.ACCESS_READ) as m:
+                view = funcs.SequenceView(m)[6:]
+                self.assertEqual(bytes(view), b'world')
+                self.assertEqual(view.index(ord('o')), 1)
+                self.assertEqual(view.count(ord('o')), 1)
+                self.assertNotIn(ord('h'), view)
+
+
+class SharedSequenceViewTests(TestCase):
+    def test_array(self):
+        with funcs.SharedSequenceView(array('i', range(100))) as view:
+            self.assertEqual(len(view), 100)
+            self.assertEqual(list(view[10:13]), [10, 11, 12])
+            self.assertEqual(view.index(42), 42)
+            self.assertEqual(view.count(7), 1)
+
+    def test_pickles_as_handle(self):
+        with funcs.SharedSequenceView(bytes(1_000_000)) as view:
+            data = pickle.dumps(view[1:])
+            self.assertLess(len(data), 200)
+            attached = pickle.loads(data)
+            self.assertEqual(len(attached), 999_999)
+            self.assertEqual(attached.name, view.name)
+            attached.close()
+
+    def test_process_pool(self):
+        with funcs.SharedSequenceView(array('d', range(1000))) as view, ProcessPoolExecutor(2) as executor:
+            windows = [view[i:i + 250] for i in range(0, 1000, 250)]
+            results = list(executor.map(_shared_sum, windows))
+        self.assertEqual({name for name, _ in results}, {view.name})
+        self.assertEqual(sum(total for _, total in results), sum(range(1000)))
+
+    @skipIf(funcs.np is None, 'NumPy is not installed')
+    def test_numpy(self):
+        data = funcs.np.arange(10, dtype=funcs.np.float64)
+        with funcs.SharedSequenceView(data) as view:
+            self.assertEqual(list(view[::3]), [0.0, 3.0, 6.0, 9.0])
+        self.assertRaises(ValueError, funcs.SharedSequenceView, data.reshape(2, 5))
+
+    def test_close_and_unlink(self):
+        view = funcs.SharedSequenceView(b'abc')
+        view.close()
+        self.assertRaises(ValueError, pickle.dumps, view)
+        view.unlink()
+        self.assertRaises(FileNotFoundError, funcs.SharedMemory, view.name)
+        self.assertRaises(TypeError, funcs.SharedSequenceView, [1, 2, 3])
+
+    def test_dropped_views_unlink(self):
+        view = funcs.SharedSequenceView(array('q', range(10)))[2:5]
+        name = view.name
+        it = iter(view)
+        del view
+        self.assertEqual(list(it), [2, 3, 4])
+        self.assertEqual(list(reversed(funcs.SharedSequenceView(b'abc')[1:])), [99, 98])
+        del it
+        self.assertRaises(FileNotFoundError, funcs.SharedMemory, name)
+
+    def test_close_keeps_siblings(self):
+        view = funcs.SharedSequenceView(b'abc')
+        window = view[1:]
+        it = reversed(view)
+        view.close()
+        self.assertEqual(bytes(window), b'bc')
+        self.assertEqual(list(it), [99, 98, 97])
+        self.assertIsNotNone(view._shm.buf)
+        window.close()
+        self.assertIsNone(view._shm.buf)
+        self.assertRaises(FileNotFoundError, funcs.SharedMemory, view.name)
+        view.unlink()
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        funcs.reset_metrics()
+        self.addCleanup(funcs.reset_metrics)
+        self.addCleanup(funcs.uninstrument)
+
+    def test_off_by_default(self):
+        self.assertFalse(hasattr(funcs.chunked, '__wrapped__'))
+        list(funcs.chunked(range(4), 2))
+        self.assertEqual(funcs.metrics_snapshot(), {})
+
+    def test_counts(self):
+        funcs.instrument('chunked', 'map_if')
+        actual = list(funcs.map_if(funcs.chunked(iter(range(6)), 2), lambda c: c[0], sum))
+        self.assertEqual(actual, [[0, 1], 5, 9])
+        snapshot = funcs.metrics_snapshot()
+        self.assertEqual(snapshot['chunked']['calls'], 1)
+        self.assertEqual(snapshot['chunked']['items'], 3)
+        self.assertEqual(snapshot['map_if']['items'], 3)
+        self.assertGreater(snapshot['map_if']['callback_seconds'], 0)
+        self.assertGreater(snapshot['map_if']['upstream_seconds'], 0)
+        self.assertEqual(sum(snapshot['map_if']['latency_buckets'].values()), 3)
+        self.assertNotIn('difference', snapshot)
+
+    def test_fast_paths_kept(self):
+        funcs.instrument()
+        chunks = list(funcs.chunked(b'abcd', 2))
+        self.assertTrue(all(isinstance(chunk, memoryview) for chunk in chunks))
+        self.assertEqual(list(funcs.split_after('a,b', ',')), [['a', ','], ['b']])
+        self.assertEqual(list(funcs.difference([1, 3, 6], initial=0)), [2, 3])
+
+    @skipIf(funcs.np is None, 'ufunc callbacks need numpy')
+    def test_ufunc_callbacks_kept(self):
+        funcs.instrument('difference')
+        with patch.object(funcs, '_numeric_view', wraps=funcs._numeric_view) as numeric_view:
+            for func in (sub, funcs.np.subtract):
+                self.assertEqual(list(funcs.difference(array('q', [1, 3, 6]), func, vectorize=True)), [1, 2, 3])
+        self.assertEqual(numeric_view.call_count, 2)
+        self.assertEqual(funcs.metrics_snapshot()['difference']['callback_seconds'], 0)
+
+    def test_internal_calls_not_counted(self):
+        funcs.instrument()
+        self.assertEqual(list(funcs.value_chain([1, [2]], 3, max_depth=None)), [1, 2, 3])
+        self.assertEqual(list(funcs.difference([1, 3, 6], vectorize=True, block_size=2)), [1, 2, 3])
+        pipeline = funcs.Pipeline(range(6)).map_if(_is_odd, _square).split_after(_is_odd).chunked(2)
+        self.assertEqual(list(pipeline), [[[0, 1], [2, 9]], [[4, 25]]])
+        self.assertEqual(set(funcs.metrics_snapshot()), {'difference'})
+
+    def test_uninstrument(self):
+        original = funcs.chunked
+        funcs.instrument('chunked')
+        self.assertIsNot(funcs.chunked, original)
+        funcs.uninstrument('chunked')
+        self.assertIs(funcs.chunked, original)
+
+    def test_invalid_name(self):
+        self.assertRaises(ValueError, lambda: funcs.instrument('first'))
+
+    def test_text(self):
+        funcs.instrument('difference')
+        list(funcs.difference([1, 2, 4]))
+        text = funcs.metrics_text()
+        self.assertIn('funcs_helper_items_total{helper="difference"} 3', text)
+        self.assertIn('funcs_helper_next_seconds_bucket{helper="difference",le="+Inf"} 3', text)
+        self.assertIn('funcs_helper_next_seconds_count{helper="difference"} 3', text)
+
+
+class AcceleratorTests(TestCase):
+    def setUp(self):
+        if funcs._funcs is None:
+            self.skipTest('C accelerator not available')
+
+    def test_kernels_bound(self):
+        self.assertIs(funcs.interleave, funcs._funcs.interleave)
+        self.assertIs(funcs._repeat_each, funcs._funcs.repeat_each)
+        self.assertIs(funcs._split_after, funcs._funcs.split_after)
+        self.assertIs(funcs._map_if, funcs._funcs.map_if)
+
+    def test_time_limited(self):
+        plain = funcs.time_limited(1, [1, 2])
+        self.assertIsInstance(plain, funcs._funcs.time_limited)
+        self.assertIsInstance(plain, funcs.time_limited)
+        self.assertEqual(list(plain), [1, 2])
+        self.assertFalse(plain.timed_out)
+        self.assertGreater(plain.remaining, 0)
+        preemptive = funcs.time_limited(1, [1, 2], preemptive=True)
+        self.assertIsInstance(preemptive, funcs.time_limited)
+        preemptive.close()
+
+    def test_errors_propagate(self):
+        self.assertRaises(ZeroDivisionError, list, funcs.map_if([0], lambda x: 1 / x, _square))
+        self.assertRaises(ZeroDivisionError, list, funcs.split_after(iter([0]), lambda x: 1 / x))
+        self.assertRaises(TypeError, funcs.repeat_each, [1], 1.5)
+        self.assertRaises(ValueError, funcs.time_limited, -1, [])
+
+
+def _pure_funcs():
+    saved = sys.modules.get('_funcs')
+    sys.modules['_funcs'] = None
+    try:
+        spec = find_spec('funcs')
+        module = module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        if saved is None:
+            del sys.modules['_funcs']
+        else:
+            sys.modules['_funcs'] = saved
+    return module
+
+
+if funcs._funcs is not None:
+    pure_funcs = _pure_funcs()
+    accelerated = ('_funcs', 'interleave', '_repeat_each', '_split_after', '_map_if')
+
+    class _PurePython:
+        def setUp(self):
+            patcher = patch.multiple(funcs, **{name: getattr(pure_funcs, name) for name in accelerated})
+            patcher.start()
+            self.addCleanup(patcher.stop)
+            super().setUp()
+
+    for _name, _case in list(globals().items()):
+        if isinstance(_case, type) and issubclass(_case, TestCase) and _case is not TestCase:
+            globals()['Pure' + _name] = type('Pure' + _name, (_PurePython, _case), {})
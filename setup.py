@@ -0,0 +1,7 @@
+from setuptools import setup, Extension
+
+setup(
+    name='funcs',
+    py_modules=['funcs', 'funcs_aio'],
+    ext_modules=[Extension('_funcs', ['_funcs.c'], optional=True)],
+)